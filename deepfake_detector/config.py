@@ -34,6 +34,12 @@ AUDIO_SAMPLE_RATE = 16000  # Hz
 NUM_WORKERS = 4
 BATCH_SIZE = 8
 DEVICE = 'cuda'  # 'cuda' or 'cpu'
+INFERENCE_MAX_WAIT_MS = 5  # How long the inference server waits to fill a batch
+INFERENCE_TIMEOUT = 300  # seconds
+INFERENCE_QUEUE_SIZE = 128  # Pending uploads before new requests block
+RESULT_CACHE_SIZE = 512  # Responses kept for repeated uploads of the same content
+TORCH_THREADS = int(os.getenv('TORCH_THREADS', max(1, (os.cpu_count() or 1) // 2)))  # Intra-op threads for the server process
+INFERENCE_USE_PROCESSES = os.getenv('INFERENCE_USE_PROCESSES', '0') == '1'  # CPU only: run batches in worker processes
 
 # Report Configuration
 GENERATE_HEATMAPS = True
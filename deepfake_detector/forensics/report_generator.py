@@ -2,10 +2,15 @@
 Report generation for detection results.
 """
 
-import json
+import atexit
 import os
+import queue
+import secrets
+import threading
+import jinja2
+import orjson
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Callable, Optional, Union
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.lib import colors
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak, Image as RLImage
@@ -13,27 +18,238 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 
 
+HTML_REPORT_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <title>Deepfake Detection Report</title>
+    <style>
+        body {
+            font-family: Arial, sans-serif;
+            margin: 20px;
+            color: #333;
+            background-color: #f8f9fa;
+        }
+        .container {
+            max-width: 900px;
+            margin: 0 auto;
+            background: white;
+            padding: 30px;
+            border-radius: 8px;
+            box-shadow: 0 2px 10px rgba(0,0,0,0.1);
+        }
+        .header {
+            text-align: center;
+            border-bottom: 2px solid #1f77b4;
+            padding-bottom: 20px;
+            margin-bottom: 20px;
+        }
+        .case-id {
+            font-size: 12px;
+            color: #666;
+            margin-top: 10px;
+        }
+        .result-box {
+            background-color: {{ result_color }};
+            color: white;
+            padding: 15px;
+            border-radius: 5px;
+            margin: 20px 0;
+            font-size: 18px;
+            text-align: center;
+            font-weight: bold;
+        }
+        .confidence {
+            font-size: 16px;
+            margin-top: 10px;
+        }
+        .section {
+            margin: 25px 0;
+            padding: 15px;
+            background-color: #f0f5f9;
+            border-left: 4px solid #1f77b4;
+        }
+        .section-title {
+            font-size: 16px;
+            font-weight: bold;
+            color: #1f77b4;
+            margin-bottom: 10px;
+        }
+        table {
+            width: 100%;
+            border-collapse: collapse;
+            margin-top: 10px;
+        }
+        th, td {
+            padding: 10px;
+            text-align: left;
+            border-bottom: 1px solid #ddd;
+        }
+        th {
+            background-color: #1f77b4;
+            color: white;
+        }
+        .timestamp {
+            text-align: right;
+            color: #999;
+            font-size: 12px;
+            margin-top: 20px;
+            padding-top: 20px;
+            border-top: 1px solid #ddd;
+        }
+    </style>
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <h1>Deepfake Detection Report</h1>
+            <div class="case-id">Case ID: {{ case_id }}</div>
+        </div>
+        
+        <div class="result-box">
+            {{ result_text }}
+            <div class="confidence">Confidence: {{ avg_conf|percent }}</div>
+        </div>
+        
+        <div class="section">
+            <div class="section-title">File Information</div>
+            <table>
+                <tr><th>Property</th><th>Value</th></tr>
+                <tr><td>Filename</td><td>{{ filename }}</td></tr>
+                <tr><td>Media Type</td><td>{{ media_type }}</td></tr>
+                <tr><td>Analysis Time</td><td>{{ timestamp }}</td></tr>
+            </table>
+        </div>
+        
+        <div class="section">
+            <div class="section-title">Model Predictions</div>
+            <table>
+                <tr><th>Model</th><th>Result</th><th>Confidence</th></tr>
+                {%- for model_name, prediction in predictions.items() %}
+                <tr>
+                    <td>{{ model_name }}</td>
+                    <td>{{ 'Deepfake' if prediction else 'Authentic' }}</td>
+                    <td>{{ confidences.get(model_name, 0)|percent }}</td>
+                </tr>
+                {%- endfor %}
+            </table>
+        </div>
+        
+        <div class="section">
+            <div class="section-title">Metadata</div>
+            <table>
+                {%- for key, value in metadata.items() %}
+                <tr><td>{{ key }}</td><td>{{ (value|string)[:100] }}</td></tr>
+                {%- endfor %}
+            </table>
+        </div>
+        
+        <div class="timestamp">
+            Report generated on {{ timestamp }}
+        </div>
+    </div>
+</body>
+</html>
+"""
+
+_jinja_env = jinja2.Environment(autoescape=True)
+_jinja_env.filters['percent'] = lambda value: f"{value:.1%}"
+_HTML_TEMPLATE = _jinja_env.from_string(HTML_REPORT_TEMPLATE)
+
+
+def _write_bytes(path: str, data: bytes, block_size: int = 1 << 16) -> None:
+    """Write bytes straight to a file descriptor in large blocks, bypassing Python file buffering."""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        view = memoryview(data)
+        offset = 0
+        while offset < len(view):
+            offset += os.write(fd, view[offset:offset + block_size])
+    finally:
+        os.close(fd)
+
+
+class AsyncArtifactWriter:
+    """Render and write report payloads to disk on a background daemon thread."""
+    
+    def __init__(self):
+        self._queue: queue.Queue = queue.Queue()
+        self._pending = set()
+        self._pending_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._drain, daemon=True)
+        self._thread.start()
+        
+        # Don't lose pending reports when the interpreter exits
+        atexit.register(self.flush)
+    
+    def submit(self, path: str, payload: Union[bytes, Callable[[], bytes]]) -> None:
+        """Queue a payload, or a callable rendering it, to be written to path."""
+        with self._pending_lock:
+            self._pending.add(path)
+        self._queue.put((path, payload))
+    
+    def is_pending(self, path: str) -> bool:
+        """Whether path is queued or still being written."""
+        with self._pending_lock:
+            return path in self._pending
+    
+    def flush(self) -> None:
+        """Block until all queued payloads have been written."""
+        self._queue.join()
+    
+    def _drain(self) -> None:
+        while True:
+            path, payload = self._queue.get()
+            try:
+                _write_bytes(path, payload() if callable(payload) else payload)
+            except Exception as e:
+                print(f"Error writing report {path}: {e}")
+            finally:
+                with self._pending_lock:
+                    self._pending.discard(path)
+                self._queue.task_done()
+
+
 class ReportGenerator:
     """Generate detailed forensic reports."""
     
+    # Shared by all instances; built on first use
+    _styles = None
+    _title_style = None
+    _heading_style = None
+    
     def __init__(self, reports_dir: str = 'deepfake_detector/reports'):
         self.reports_dir = reports_dir
         os.makedirs(reports_dir, exist_ok=True)
-        self.styles = getSampleStyleSheet()
+        
+        self.writer = AsyncArtifactWriter()
+        
+        self._ensure_styles()
+        self.styles = self._styles
+        self.title_style = self._title_style
+        self.heading_style = self._heading_style
+    
+    @classmethod
+    def _ensure_styles(cls) -> None:
+        """Build the sample stylesheet and custom styles once per process."""
+        if cls._styles is not None:
+            return
+        
+        cls._styles = getSampleStyleSheet()
         
         # Custom styles
-        self.title_style = ParagraphStyle(
+        cls._title_style = ParagraphStyle(
             'CustomTitle',
-            parent=self.styles['Heading1'],
+            parent=cls._styles['Heading1'],
             fontSize=24,
             textColor=colors.HexColor('#1f77b4'),
             spaceAfter=30,
             alignment=1,  # Center
         )
         
-        self.heading_style = ParagraphStyle(
+        cls._heading_style = ParagraphStyle(
             'CustomHeading',
-            parent=self.styles['Heading2'],
+            parent=cls._styles['Heading2'],
             fontSize=14,
             textColor=colors.HexColor('#1f77b4'),
             spaceAfter=12,
@@ -49,22 +265,30 @@ class ReportGenerator:
             output_path: Optional custom output path
             
         Returns:
-            Path to generated report
+            Path the report is written to; it is rendered and written in the
+            background (call flush() to wait for it)
         """
         if output_path is None:
             filename = f"{detection_result.filename.replace('/', '_')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
             output_path = os.path.join(self.reports_dir, filename)
         
+        self.writer.submit(output_path, lambda: self._render_json(detection_result))
+        
+        return output_path
+    
+    def _render_json(self, detection_result: Any) -> bytes:
+        """Serialize a JSON report."""
         report_data = {
             'generation_timestamp': datetime.now().isoformat(),
             'case_id': self._generate_case_id(),
             'analysis': detection_result.to_dict(),
         }
         
-        with open(output_path, 'w') as f:
-            json.dump(report_data, f, indent=2, default=str)
-        
-        return output_path
+        return orjson.dumps(
+            report_data,
+            default=str,
+            option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+        )
     
     def generate_html_report(self, detection_result: Any, output_path: Optional[str] = None) -> str:
         """
@@ -75,171 +299,71 @@ class ReportGenerator:
             output_path: Optional custom output path
             
         Returns:
-            Path to generated report
+            Path the report is written to; it is rendered and written in the
+            background (call flush() to wait for it)
         """
         if output_path is None:
             filename = f"{detection_result.filename.replace('/', '_')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.html"
             output_path = os.path.join(self.reports_dir, filename)
         
+        self.writer.submit(output_path, lambda: self._render_html(detection_result))
+        
+        return output_path
+    
+    def _render_html(self, detection_result: Any) -> bytes:
+        """Render an HTML report."""
         consensus, avg_conf = detection_result.get_consensus()
         result_text = "⚠️ LIKELY DEEPFAKE" if consensus else "✓ AUTHENTIC"
         result_color = "#dc3545" if consensus else "#28a745"
         
-        html_content = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="UTF-8">
-            <title>Deepfake Detection Report</title>
-            <style>
-                body {{
-                    font-family: Arial, sans-serif;
-                    margin: 20px;
-                    color: #333;
-                    background-color: #f8f9fa;
-                }}
-                .container {{
-                    max-width: 900px;
-                    margin: 0 auto;
-                    background: white;
-                    padding: 30px;
-                    border-radius: 8px;
-                    box-shadow: 0 2px 10px rgba(0,0,0,0.1);
-                }}
-                .header {{
-                    text-align: center;
-                    border-bottom: 2px solid #1f77b4;
-                    padding-bottom: 20px;
-                    margin-bottom: 20px;
-                }}
-                .case-id {{
-                    font-size: 12px;
-                    color: #666;
-                    margin-top: 10px;
-                }}
-                .result-box {{
-                    background-color: {result_color};
-                    color: white;
-                    padding: 15px;
-                    border-radius: 5px;
-                    margin: 20px 0;
-                    font-size: 18px;
-                    text-align: center;
-                    font-weight: bold;
-                }}
-                .confidence {{
-                    font-size: 16px;
-                    margin-top: 10px;
-                }}
-                .section {{
-                    margin: 25px 0;
-                    padding: 15px;
-                    background-color: #f0f5f9;
-                    border-left: 4px solid #1f77b4;
-                }}
-                .section-title {{
-                    font-size: 16px;
-                    font-weight: bold;
-                    color: #1f77b4;
-                    margin-bottom: 10px;
-                }}
-                table {{
-                    width: 100%;
-                    border-collapse: collapse;
-                    margin-top: 10px;
-                }}
-                th, td {{
-                    padding: 10px;
-                    text-align: left;
-                    border-bottom: 1px solid #ddd;
-                }}
-                th {{
-                    background-color: #1f77b4;
-                    color: white;
-                }}
-                .timestamp {{
-                    text-align: right;
-                    color: #999;
-                    font-size: 12px;
-                    margin-top: 20px;
-                    padding-top: 20px;
-                    border-top: 1px solid #ddd;
-                }}
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <div class="header">
-                    <h1>Deepfake Detection Report</h1>
-                    <div class="case-id">Case ID: {self._generate_case_id()}</div>
-                </div>
-                
-                <div class="result-box">
-                    {result_text}
-                    <div class="confidence">Confidence: {avg_conf:.1%}</div>
-                </div>
-                
-                <div class="section">
-                    <div class="section-title">File Information</div>
-                    <table>
-                        <tr><th>Property</th><th>Value</th></tr>
-                        <tr><td>Filename</td><td>{detection_result.filename}</td></tr>
-                        <tr><td>Media Type</td><td>{detection_result.media_type}</td></tr>
-                        <tr><td>Analysis Time</td><td>{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</td></tr>
-                    </table>
-                </div>
-                
-                <div class="section">
-                    <div class="section-title">Model Predictions</div>
-                    <table>
-                        <tr><th>Model</th><th>Result</th><th>Confidence</th></tr>
-        """
+        html_content = _HTML_TEMPLATE.render(
+            case_id=self._generate_case_id(),
+            result_text=result_text,
+            result_color=result_color,
+            avg_conf=avg_conf,
+            filename=detection_result.filename,
+            media_type=detection_result.media_type,
+            timestamp=datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            predictions=detection_result.predictions,
+            confidences=detection_result.confidence_scores,
+            metadata=detection_result.metadata,
+        )
         
-        for model_name, prediction in detection_result.predictions.items():
-            confidence = detection_result.confidence_scores.get(model_name, 0)
-            result = "Deepfake" if prediction else "Authentic"
-            html_content += f"""
-                        <tr>
-                            <td>{model_name}</td>
-                            <td>{result}</td>
-                            <td>{confidence:.1%}</td>
-                        </tr>
-            """
-        
-        html_content += """
-                    </table>
-                </div>
-                
-                <div class="section">
-                    <div class="section-title">Metadata</div>
-                    <table>
+        return html_content.encode('utf-8')
+    
+    def generate_metadata_report(self, detection_result: Any, output_path: Optional[str] = None) -> str:
         """
+        Write the full metadata of a result as JSON.
         
-        for key, value in detection_result.metadata.items():
-            html_content += f"""
-                        <tr><td>{key}</td><td>{str(value)[:100]}</td></tr>
-            """
-        
-        html_content += f"""
-                    </table>
-                </div>
-                
-                <div class="timestamp">
-                    Report generated on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-                </div>
-            </div>
-        </body>
-        </html>
+        Args:
+            detection_result: DetectionResult object
+            output_path: Optional custom output path
+            
+        Returns:
+            Path the metadata is written to; it is serialized and written in the
+            background (call flush() to wait for it)
         """
+        if output_path is None:
+            filename = f"{detection_result.filename.replace('/', '_')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.meta.json"
+            output_path = os.path.join(self.reports_dir, filename)
         
-        with open(output_path, 'w') as f:
-            f.write(html_content)
+        self.writer.submit(output_path, lambda: orjson.dumps(
+            detection_result.metadata,
+            default=str,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+        ))
         
         return output_path
     
+    def is_pending(self, report_path: str) -> bool:
+        """Whether a report is still being rendered or written."""
+        return self.writer.is_pending(report_path)
+    
+    def flush(self) -> None:
+        """Wait for all pending report writes to reach disk."""
+        self.writer.flush()
+    
     def _generate_case_id(self) -> str:
         """Generate unique case ID."""
         timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-        import random
-        random_part = ''.join([str(random.randint(0, 9)) for _ in range(4)])
-        return f"CASE-{timestamp}-{random_part}"
+        return f"CASE-{timestamp}-{secrets.token_hex(2)}"
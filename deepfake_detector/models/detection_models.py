@@ -4,6 +4,7 @@ Base model definitions for deepfake detection.
 
 import torch
 import torch.nn as nn
+from torch.nn.utils.fusion import fuse_conv_bn_eval
 from typing import Dict, Any
 
 
@@ -23,6 +24,23 @@ class BaseDetectionModel(nn.Module):
         """Get confidence scores from logits."""
         return torch.nn.functional.softmax(logits, dim=1)
     
+    def fuse_conv_bn(self) -> None:
+        """
+        Fold each `bnN` BatchNorm into the preceding `convN` Conv2d for inference.
+        
+        The fused conv absorbs the BN affine transform and the BN module is
+        replaced with an identity. Only valid in eval mode.
+        """
+        for name, module in list(self.named_children()):
+            if not (name.startswith('bn') and isinstance(module, nn.BatchNorm2d)):
+                continue
+            
+            conv_name = 'conv' + name[len('bn'):]
+            conv = getattr(self, conv_name, None)
+            if isinstance(conv, nn.Conv2d):
+                setattr(self, conv_name, fuse_conv_bn_eval(conv, module))
+                setattr(self, name, nn.Identity())
+    
     def get_model_info(self) -> Dict[str, Any]:
         """Get model information."""
         return {
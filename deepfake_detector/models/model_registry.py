@@ -2,9 +2,16 @@
 Model registry and loading utilities.
 """
 
+import functools
+import io
 import torch
 import os
 from typing import Optional, Dict, Any
+try:
+    import onnxruntime
+except ImportError:
+    onnxruntime = None
+from deepfake_detector.config import BATCH_SIZE
 from deepfake_detector.models.detection_models import (
     DeepfakeClassifier,
     GANArtifactDetector,
@@ -13,23 +20,114 @@ from deepfake_detector.models.detection_models import (
 )
 
 
+MODEL_CLASSES = {
+    'deepfake_classifier': DeepfakeClassifier,
+    'gan_detector': GANArtifactDetector,
+    'facial_forensics': FacialForensicsModel,
+    'face_detection': FaceDetectionModel,
+}
+
+
+@functools.lru_cache(maxsize=8)
+def _read_checkpoint(checkpoint_path: str, mtime: float) -> Any:
+    """Read a checkpoint onto the CPU, memoized by path and modification time."""
+    return torch.load(checkpoint_path, map_location='cpu', weights_only=True)
+
+
+def load_checkpoint(model: torch.nn.Module, checkpoint_path: str) -> bool:
+    """
+    Load weights into a model from a checkpoint file if it exists.
+    
+    Args:
+        model: Model to load weights into
+        checkpoint_path: Path to a state dict, or a dict with a 'state_dict' key
+        
+    Returns:
+        True if a checkpoint was loaded
+    """
+    if not os.path.exists(checkpoint_path):
+        return False
+    
+    checkpoint = _read_checkpoint(checkpoint_path, os.path.getmtime(checkpoint_path))
+    if isinstance(checkpoint, dict) and 'state_dict' in checkpoint:
+        model.load_state_dict(checkpoint['state_dict'])
+    else:
+        model.load_state_dict(checkpoint)
+    
+    return True
+
+
+class OnnxModel:
+    """Callable wrapper running an exported model through ONNX Runtime."""
+    
+    def __init__(self, session: 'onnxruntime.InferenceSession'):
+        self.session = session
+        self.input_name = session.get_inputs()[0].name
+    
+    def __call__(self, x: torch.Tensor) -> Any:
+        """Run the session on a CPU batch, returning tensors like the torch model would."""
+        outputs = self.session.run(None, {self.input_name: x.detach().cpu().contiguous().numpy()})
+        tensors = tuple(torch.from_numpy(output) for output in outputs)
+        return tensors[0] if len(tensors) == 1 else tensors
+
+
+# (minimum free GiB, FP16 batch size at 224x224), largest first
+_BATCH_SIZE_TABLE = ((24, 128), (12, 64), (6, 32), (3, 16))
+
+
 class ModelRegistry:
     """Registry for managing detection models."""
     
     _models: Dict[str, torch.nn.Module] = {}
+    _onnx_sessions: Dict[str, OnnxModel] = {}
     _device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+    _batch_size: Optional[int] = None  # chosen from free device memory once models are loaded
     
     @classmethod
     def register_model(cls, name: str, model: torch.nn.Module) -> None:
         """Register a model."""
-        cls._models[name] = model.to(cls._device)
+        # channels_last matches cuDNN's preferred convolution layout
+        cls._models[name] = model.to(cls._device).to(memory_format=torch.channels_last)
         print(f"Model registered: {name}")
     
     @classmethod
     def get_model(cls, name: str) -> Optional[torch.nn.Module]:
-        """Get a registered model."""
+        """Get a registered model, routed through ONNX Runtime when running on CPU."""
+        if cls._device.type == 'cpu' and name in cls._onnx_sessions:
+            return cls._onnx_sessions[name]
         return cls._models.get(name)
     
+    @classmethod
+    def find_batch_size(cls, input_res: int = 224, dtype: torch.dtype = torch.float16) -> int:
+        """
+        Pick a batch size that fits in the free memory of the current device.
+        
+        Args:
+            input_res: Side length of the square model input
+            dtype: Activation dtype; FP32 halves the batch
+            
+        Returns:
+            Batch size; the config default off CUDA or on small GPUs
+        """
+        if cls._device.type != 'cuda':
+            return BATCH_SIZE
+        
+        free_gib = torch.cuda.mem_get_info(cls._device)[0] / 1024 ** 3
+        batch_size = next((size for min_gib, size in _BATCH_SIZE_TABLE if free_gib >= min_gib), BATCH_SIZE)
+        if dtype == torch.float32:
+            batch_size //= 2
+        
+        # Activation memory grows with the number of pixels
+        batch_size = int(batch_size * (224 / input_res) ** 2)
+        return max(1, batch_size)
+    
+    @classmethod
+    def get_batch_size(cls) -> int:
+        """Get the batch size chosen for the loaded models."""
+        if cls._batch_size is None:
+            cls._batch_size = cls.find_batch_size()
+        return cls._batch_size
+    
     @classmethod
     def list_models(cls) -> list:
         """List all registered models."""
@@ -43,31 +141,91 @@ class ModelRegistry:
         Args:
             model_dir: Directory containing model checkpoints
         """
-        models_config = {
-            'deepfake_classifier': DeepfakeClassifier,
-            'gan_detector': GANArtifactDetector,
-            'facial_forensics': FacialForensicsModel,
-            'face_detection': FaceDetectionModel,
-        }
-        
-        for model_name, model_class in models_config.items():
+        for model_name, model_class in MODEL_CLASSES.items():
             try:
                 model = model_class()
                 
                 # Try to load checkpoint if it exists
                 checkpoint_path = os.path.join(model_dir, f'{model_name}.pth')
-                if os.path.exists(checkpoint_path):
-                    checkpoint = torch.load(checkpoint_path, map_location=cls._device)
-                    if isinstance(checkpoint, dict) and 'state_dict' in checkpoint:
-                        model.load_state_dict(checkpoint['state_dict'])
-                    else:
-                        model.load_state_dict(checkpoint)
+                if load_checkpoint(model, checkpoint_path):
                     print(f"Loaded checkpoint for {model_name}")
                 
-                cls.register_model(model_name, model)
                 model.eval()
+                model.fuse_conv_bn()
+                cls.register_model(model_name, model)
+                
+                onnx_model = cls._export_onnx(model_name, model) if cls._device.type == 'cpu' else None
+                if onnx_model is not None:
+                    cls._onnx_sessions[model_name] = onnx_model
+                else:
+                    cls._models[model_name] = cls._compile_model(model_name, cls._models[model_name])
             except Exception as e:
                 print(f"Warning: Failed to load model {model_name}: {e}")
+        
+        # Size batches against whatever memory the weights left free
+        cls._batch_size = cls.find_batch_size()
+    
+    @classmethod
+    def _export_onnx(cls, name: str, model: torch.nn.Module) -> Optional[OnnxModel]:
+        """
+        Export a model to ONNX and load it into an optimized ONNX Runtime CPU session.
+        
+        Returns None if onnxruntime is not installed or the export fails.
+        """
+        if onnxruntime is None:
+            return None
+        
+        try:
+            buffer = io.BytesIO()
+            dummy = torch.randn(1, 3, 224, 224)
+            torch.onnx.export(
+                model, dummy, buffer,
+                opset_version=17,
+                input_names=['input'],
+                dynamic_axes={'input': {0: 'batch'}},
+            )
+            
+            options = onnxruntime.SessionOptions()
+            options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+            session = onnxruntime.InferenceSession(
+                buffer.getvalue(), sess_options=options, providers=['CPUExecutionProvider']
+            )
+            return OnnxModel(session)
+        except Exception as e:
+            print(f"Warning: Failed to export model {name} to ONNX: {e}")
+            return None
+    
+    @classmethod
+    def _compile_model(cls, name: str, model: torch.nn.Module) -> torch.nn.Module:
+        """
+        Compile a model and warm it up so compilation stays off the request path.
+        
+        Returns the eager model if compilation is unavailable or fails.
+        """
+        if not hasattr(torch, 'compile'):
+            return model
+        
+        try:
+            # Max-autotune without CUDA graphs: models are called from several predictor threads
+            # and per-model side streams, while captured graphs are thread-local and tied to one
+            # stream. Spelled as options, since the 'max-autotune-no-cudagraphs' mode needs torch 2.1
+            compiled = torch.compile(model, fullgraph=True, options={
+                'max_autotune': True,
+                'triton.cudagraphs': False,
+            })
+            
+            # First call triggers compilation and kernel autotuning; with fullgraph=True a model
+            # that can't be compiled raises here instead of silently running eager
+            example = torch.randn(1, 3, 224, 224, device=cls._device).to(memory_format=torch.channels_last)
+            with torch.inference_mode(), torch.autocast(
+                device_type=cls._device.type, dtype=torch.float16, enabled=cls._device.type == 'cuda'
+            ):
+                compiled(example)
+            
+            return compiled
+        except Exception as e:
+            print(f"Warning: Failed to compile model {name}: {e}")
+            return model
     
     @classmethod
     def set_device(cls, device: str) -> None:
@@ -93,28 +251,13 @@ def create_model(model_type: str, pretrained: bool = False) -> Optional[torch.nn
     Returns:
         Model instance or None if type not found
     """
-    models = {
-        'deepfake_classifier': DeepfakeClassifier,
-        'gan_detector': GANArtifactDetector,
-        'facial_forensics': FacialForensicsModel,
-        'face_detection': FaceDetectionModel,
-    }
-    
-    if model_type not in models:
+    if model_type not in MODEL_CLASSES:
         print(f"Unknown model type: {model_type}")
         return None
     
-    model = models[model_type]()
+    model = MODEL_CLASSES[model_type]()
     
     if pretrained:
-        device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
-        checkpoint_path = f'models/{model_type}.pth'
-        
-        if os.path.exists(checkpoint_path):
-            checkpoint = torch.load(checkpoint_path, map_location=device)
-            if isinstance(checkpoint, dict) and 'state_dict' in checkpoint:
-                model.load_state_dict(checkpoint['state_dict'])
-            else:
-                model.load_state_dict(checkpoint)
+        load_checkpoint(model, f'models/{model_type}.pth')
     
     return model
@@ -2,14 +2,40 @@
 File handling utilities for media upload and processing.
 """
 
+import hashlib
 import os
+import re
+from typing import BinaryIO, Iterator
 from werkzeug.utils import secure_filename
 from deepfake_detector.config import ALLOWED_EXTENSIONS, MAX_FILE_SIZE
 
 
+_ALLOWED_EXTS = frozenset('.' + ext.lower().lstrip('.') for ext in ALLOWED_EXTENSIONS)
+# Names secure_filename would return unchanged: ASCII word characters, dots and dashes,
+# not starting or ending with '.' or '_'
+_SAFE_FILENAME_RE = re.compile(r'[A-Za-z0-9-](?:[A-Za-z0-9_.-]{0,253}[A-Za-z0-9-])?')
+# Matches names ending in an allowed extension, built from ALLOWED_EXTENSIONS
+_MEDIA_RE = re.compile(
+    r'\.(?:' + '|'.join(sorted(re.escape(ext[1:]) for ext in _ALLOWED_EXTS)) + r')\Z', re.IGNORECASE
+)
+_EXT_TO_KIND = {
+    '.jpg': 'image', '.jpeg': 'image', '.png': 'image', '.gif': 'image', '.bmp': 'image',
+    '.mp4': 'video', '.avi': 'video', '.mov': 'video', '.mkv': 'video',
+    '.wav': 'audio', '.mp3': 'audio', '.m4a': 'audio',
+}
+
+
 def allowed_file(filename: str) -> bool:
     """Check if file extension is allowed."""
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+    return os.path.splitext(filename)[1].lower() in _ALLOWED_EXTS
+
+
+def iter_media(directory: str) -> Iterator[str]:
+    """Yield the paths of files in directory with an allowed extension."""
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if _MEDIA_RE.search(entry.name) and entry.is_file():
+                yield entry.path
 
 
 def validate_upload(filename: str, file_size: int) -> tuple[bool, str]:
@@ -39,13 +65,17 @@ def validate_upload(filename: str, file_size: int) -> tuple[bool, str]:
 
 
 def get_secure_filename(filename: str) -> str:
-    """Get secure filename."""
+    """Get secure filename, skipping normalization for names that are already safe."""
+    if os.name != 'nt' and _SAFE_FILENAME_RE.fullmatch(filename):
+        return filename
     return secure_filename(filename)
 
 
 def get_file_type(filepath: str) -> str:
     """
-    Determine file type (image, video, audio).
+    Determine file type (image, video, audio) from the file extension.
+    
+    The file is not checked for existence; use assert_exists for that.
     
     Args:
         filepath: Path to file
@@ -53,20 +83,43 @@ def get_file_type(filepath: str) -> str:
     Returns:
         File type string: 'image', 'video', 'audio', or 'unknown'
     """
+    return _EXT_TO_KIND.get(os.path.splitext(filepath)[1].lower(), 'unknown')
+
+
+def assert_exists(filepath: str) -> None:
+    """Raise FileNotFoundError if the file does not exist."""
     if not os.path.exists(filepath):
-        return 'unknown'
-    
-    # Extension-based detection (simple and reliable)
-    ext = os.path.splitext(filepath)[1].lower()
+        raise FileNotFoundError(f"File not found: {filepath}")
+
+
+def file_stat(filepath: str) -> os.stat_result:
+    """
+    Stat a file.
     
-    if ext in {'.jpg', '.jpeg', '.png', '.gif', '.bmp'}:
-        return 'image'
-    elif ext in {'.mp4', '.avi', '.mov', '.mkv'}:
-        return 'video'
-    elif ext in {'.wav', '.mp3', '.m4a'}:
-        return 'audio'
+    Not cached: a cache keyed on the path returns stale sizes when a file is
+    rewritten in place, and keying on mtime would need a stat call anyway.
+    """
+    return os.stat(filepath)
+
+
+def save_upload(stream: BinaryIO, filepath: str, chunk_size: int = 1 << 20) -> str:
+    """
+    Stream an uploaded file to disk in large chunks, hashing it on the way.
     
-    return 'unknown'
+    Args:
+        stream: Readable upload stream
+        filepath: Destination path
+        chunk_size: Bytes copied per read
+        
+    Returns:
+        Hex digest of the file content
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(filepath, 'wb') as dst:
+        while chunk := stream.read(chunk_size):
+            digest.update(chunk)
+            dst.write(chunk)
+    return digest.hexdigest()
 
 
 def ensure_upload_dir(upload_dir: str) -> None:
@@ -2,22 +2,65 @@
 Media processing utilities for images, videos, and audio.
 """
 
+import os
+import threading
 import cv2
 import numpy as np
-from pathlib import Path
-from typing import List, Tuple, Optional
+import torch
+from collections import OrderedDict
+from PIL import Image
+from typing import Dict, Iterator, List, Tuple, Optional
 import librosa
 import soundfile as sf
+import soxr
+try:
+    import torchaudio
+except ImportError:
+    torchaudio = None
+from deepfake_detector.utils.file_handler import file_stat
+
+# EXIF tag holding the camera orientation
+_EXIF_ORIENTATION = 0x0112
 
 
 class ImageProcessor:
     """Handle image processing operations."""
     
     @staticmethod
-    def read_image(image_path: str) -> Optional[np.ndarray]:
-        """Read image from file."""
+    def _reduced_read_flag(image_path: str, max_dim: int) -> int:
+        """Pick the largest decode-time downscale that keeps the shorter side at least max_dim."""
+        try:
+            # Pillow only parses the header here; no pixels are decoded
+            with Image.open(image_path) as im:
+                w, h = im.size
+        except Exception:
+            return cv2.IMREAD_COLOR
+        
+        for factor, flag in ((8, cv2.IMREAD_REDUCED_COLOR_8),
+                             (4, cv2.IMREAD_REDUCED_COLOR_4),
+                             (2, cv2.IMREAD_REDUCED_COLOR_2)):
+            if min(w, h) >= factor * max_dim:
+                return flag
+        return cv2.IMREAD_COLOR
+    
+    @staticmethod
+    def read_image(image_path: str, max_dim: Optional[int] = None) -> Optional[np.ndarray]:
+        """
+        Read image from file.
+        
+        Args:
+            image_path: Path to image file
+            max_dim: If given, allow the decoder to downscale (JPEG natively,
+                by 2, 4 or 8) as long as the shorter side stays >= max_dim
+            
+        Returns:
+            RGB image, or None if it could not be read
+        """
         try:
-            img = cv2.imread(image_path)
+            flags = cv2.IMREAD_COLOR
+            if max_dim:
+                flags = ImageProcessor._reduced_read_flag(image_path, max_dim)
+            img = cv2.imread(image_path, flags)
             if img is None:
                 return None
             return cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
@@ -31,26 +74,50 @@ class ImageProcessor:
         return cv2.resize(image, target_size, interpolation=cv2.INTER_LINEAR)
     
     @staticmethod
-    def normalize_image(image: np.ndarray) -> np.ndarray:
-        """Normalize image to [0, 1] range."""
-        return image.astype(np.float32) / 255.0
+    def normalize_image(image: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Normalize image to [0, 1] range, optionally into a preallocated float32 buffer."""
+        if out is None:
+            out = np.empty(image.shape, dtype=np.float32)
+        np.multiply(image, np.float32(1.0 / 255.0), out=out, casting='unsafe')
+        return out
+    
+    @staticmethod
+    def resize_and_normalize(image: np.ndarray, target_size: Tuple[int, int],
+                             out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Resize image to target size and normalize it to [0, 1] in one step."""
+        resized = cv2.resize(image, target_size, interpolation=cv2.INTER_LINEAR)
+        return ImageProcessor.normalize_image(resized, out=out)
     
     @staticmethod
     def get_image_metadata(image_path: str) -> dict:
-        """Extract image metadata using OpenCV."""
+        """
+        Extract image metadata from the file header, decoding with OpenCV only as a fallback.
+        
+        Values match what cv2.imread reports: sizes are after EXIF orientation, and
+        channels is 3 because images are always decoded to BGR.
+        """
         try:
-            img = cv2.imread(image_path)
-            if img is None:
-                return {}
-            
-            h, w = img.shape[:2]
-            channels = img.shape[2] if len(img.shape) > 2 else 1
+            try:
+                # Pillow opens lazily; only the header is parsed
+                with Image.open(image_path) as im:
+                    w, h = im.size
+                    # Orientations 5-8 rotate by 90 degrees, as cv2.imread applies
+                    if im.getexif().get(_EXIF_ORIENTATION, 1) in (5, 6, 7, 8):
+                        w, h = h, w
+                    channels = 3
+            except Exception:
+                img = cv2.imread(image_path)
+                if img is None:
+                    return {}
+                
+                h, w = img.shape[:2]
+                channels = img.shape[2] if len(img.shape) > 2 else 1
             
             return {
                 'width': w,
                 'height': h,
                 'channels': channels,
-                'file_size': Path(image_path).stat().st_size,
+                'file_size': file_stat(image_path).st_size,
             }
         except Exception as e:
             print(f"Error extracting image metadata: {e}")
@@ -60,24 +127,31 @@ class ImageProcessor:
 class VideoProcessor:
     """Handle video processing operations."""
     
+    # Small LRU of open captures keyed by (path, mtime) for repeated seeks
+    _capture_cache: "OrderedDict[Tuple[str, float], cv2.VideoCapture]" = OrderedDict()
+    _capture_cache_size = 4
+    _capture_lock = threading.Lock()
+    
     @staticmethod
     def get_video_properties(video_path: str) -> dict:
         """Get video properties."""
         try:
             cap = cv2.VideoCapture(video_path)
-            
-            properties = {
-                'width': int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
-                'height': int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
-                'fps': cap.get(cv2.CAP_PROP_FPS),
-                'frame_count': int(cap.get(cv2.CAP_PROP_FRAME_COUNT)),
-                'duration': int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) / cap.get(cv2.CAP_PROP_FPS),
-                'codec': int(cap.get(cv2.CAP_PROP_FOURCC)),
-                'file_size': Path(video_path).stat().st_size,
-            }
-            
-            cap.release()
-            return properties
+            try:
+                frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+                fps = cap.get(cv2.CAP_PROP_FPS)
+                
+                return {
+                    'width': int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                    'height': int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+                    'fps': fps,
+                    'frame_count': frame_count,
+                    'duration': frame_count / fps if fps else 0.0,
+                    'codec': int(cap.get(cv2.CAP_PROP_FOURCC)),
+                    'file_size': file_stat(video_path).st_size,
+                }
+            finally:
+                cap.release()
         except Exception as e:
             print(f"Error getting video properties: {e}")
             return {}
@@ -99,12 +173,13 @@ class VideoProcessor:
             cap = cv2.VideoCapture(video_path)
             frame_count = 0
             
-            while True:
-                ret, frame = cap.read()
-                if not ret:
-                    break
-                
+            # grab() advances without converting the frame; only sampled
+            # frames pay for retrieve() and the color conversion
+            while cap.grab():
                 if frame_count % sample_rate == 0:
+                    ret, frame = cap.retrieve()
+                    if not ret:
+                        break
                     frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
                     frames.append(frame_rgb)
                 
@@ -117,16 +192,79 @@ class VideoProcessor:
         return frames
     
     @staticmethod
-    def get_frame_at_time(video_path: str, time_seconds: float) -> Optional[np.ndarray]:
-        """Get specific frame at given time."""
+    def extract_frames_cuda(video_path: str, sample_rate: int = 5,
+                            device: torch.device = torch.device('cuda'),
+                            chunk_size: int = 32) -> Optional[Iterator[torch.Tensor]]:
+        """
+        Decode frames on the GPU with NVDEC via torchcodec, a chunk at a time.
+        
+        Only one chunk of full-resolution frames is held on the device at once,
+        so long or high-resolution videos don't exhaust GPU memory.
+        
+        Args:
+            video_path: Path to video file
+            sample_rate: Extract every nth frame
+            device: CUDA device to decode onto
+            chunk_size: Maximum number of sampled frames per chunk
+            
+        Returns:
+            Iterator over uint8 tensors of shape (<= chunk_size, 3, H, W) in RGB
+            order on `device`, or None if GPU decoding is unavailable
+        """
+        try:
+            from torchcodec.decoders import VideoDecoder
+        except ImportError:
+            return None
+        
         try:
+            decoder = VideoDecoder(video_path, device=str(device))
+            num_frames = len(decoder)
+        except Exception as e:
+            print(f"Error decoding frames on GPU: {e}")
+            return None
+        
+        if num_frames == 0:
+            return None
+        
+        step = chunk_size * sample_rate
+        return (decoder[start:min(start + step, num_frames):sample_rate] for start in range(0, num_frames, step))
+    
+    @classmethod
+    def _open_capture(cls, video_path: str) -> cv2.VideoCapture:
+        """Get an open capture for the video, reusing a cached handle if the file is unchanged."""
+        key = (video_path, os.path.getmtime(video_path))
+        
+        cap = cls._capture_cache.pop(key, None)
+        if cap is None:
             cap = cv2.VideoCapture(video_path)
-            fps = cap.get(cv2.CAP_PROP_FPS)
-            frame_number = int(time_seconds * fps)
-            
-            cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
-            ret, frame = cap.read()
-            cap.release()
+        cls._capture_cache[key] = cap
+        
+        # Evict the least recently used handles
+        while len(cls._capture_cache) > cls._capture_cache_size:
+            _, evicted = cls._capture_cache.popitem(last=False)
+            evicted.release()
+        
+        return cap
+    
+    @classmethod
+    def close_cache(cls) -> None:
+        """Release all cached capture handles."""
+        with cls._capture_lock:
+            for cap in cls._capture_cache.values():
+                cap.release()
+            cls._capture_cache.clear()
+    
+    @classmethod
+    def get_frame_at_time(cls, video_path: str, time_seconds: float) -> Optional[np.ndarray]:
+        """Get specific frame at given time."""
+        try:
+            with cls._capture_lock:
+                cap = cls._open_capture(video_path)
+                fps = cap.get(cv2.CAP_PROP_FPS)
+                frame_number = int(time_seconds * fps)
+                
+                cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
+                ret, frame = cap.read()
             
             if ret:
                 return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
@@ -139,6 +277,19 @@ class VideoProcessor:
 class AudioProcessor:
     """Handle audio processing operations."""
     
+    # torchaudio transforms matching the librosa defaults, built once per
+    # sample rate so their filterbanks and FFT plans are reused across calls
+    _MEL_KWARGS = {
+        'n_fft': 2048,
+        'hop_length': 512,
+        'n_mels': 128,
+        'pad_mode': 'constant',
+        'norm': 'slaney',
+        'mel_scale': 'slaney',
+    }
+    _transforms: Dict[Tuple[str, int, int, torch.device], torch.nn.Module] = {}
+    _transform_lock = threading.Lock()
+    
     @staticmethod
     def load_audio(audio_path: str, sr: int = 16000) -> Tuple[np.ndarray, int]:
         """
@@ -152,28 +303,74 @@ class AudioProcessor:
             Tuple of (audio_data, sample_rate)
         """
         try:
-            y, sr_loaded = librosa.load(audio_path, sr=sr)
-            return y, sr_loaded
+            try:
+                with sf.SoundFile(audio_path) as f:
+                    y = f.read(dtype='float32')
+                    sr_native = f.samplerate
+            except RuntimeError:
+                # Formats libsndfile can't decode (e.g. m4a) go through librosa
+                return librosa.load(audio_path, sr=sr)
+            
+            # Downmix to mono and resample once, as librosa.load would
+            if y.ndim > 1:
+                y = y.mean(axis=1)
+            if sr_native != sr:
+                y = soxr.resample(y, sr_native, sr)
+            return y, sr
         except Exception as e:
             print(f"Error loading audio: {e}")
             return np.array([]), 0
     
-    @staticmethod
-    def extract_mfcc(audio: np.ndarray, sr: int, n_mfcc: int = 13) -> np.ndarray:
-        """Extract MFCC features from audio."""
+    @classmethod
+    def _get_transform(cls, kind: str, sr: int, device: torch.device, n_mfcc: int = 13) -> torch.nn.Module:
+        """Get the cached torchaudio transform for a feature kind, sample rate and device."""
+        key = (kind, sr, n_mfcc, device)
+        with cls._transform_lock:
+            transform = cls._transforms.get(key)
+            if transform is None:
+                if kind == 'mfcc':
+                    transform = torchaudio.transforms.MFCC(
+                        sample_rate=sr, n_mfcc=n_mfcc, melkwargs=cls._MEL_KWARGS,
+                    )
+                else:
+                    transform = torch.nn.Sequential(
+                        torchaudio.transforms.MelSpectrogram(sample_rate=sr, **cls._MEL_KWARGS),
+                        torchaudio.transforms.AmplitudeToDB(stype='power', top_db=80),
+                    )
+                transform = transform.to(device)
+                cls._transforms[key] = transform
+        return transform
+    
+    @classmethod
+    def extract_mfcc(cls, audio: np.ndarray, sr: int, n_mfcc: int = 13,
+                     device: torch.device = torch.device('cpu')) -> np.ndarray:
+        """Extract MFCC features from audio, computing them on `device` when torchaudio is available."""
         try:
-            mfcc = librosa.feature.mfcc(y=audio, sr=sr, n_mfcc=n_mfcc)
-            return mfcc
+            if torchaudio is None:
+                return librosa.feature.mfcc(y=audio, sr=sr, n_mfcc=n_mfcc)
+            
+            waveform = torch.from_numpy(np.ascontiguousarray(audio, dtype=np.float32)).to(device)
+            with torch.inference_mode():
+                mfcc = cls._get_transform('mfcc', sr, device, n_mfcc)(waveform)
+            return mfcc.cpu().numpy()
         except Exception as e:
             print(f"Error extracting MFCC: {e}")
             return np.array([])
     
-    @staticmethod
-    def extract_spectrogram(audio: np.ndarray, sr: int) -> np.ndarray:
-        """Extract mel-spectrogram from audio."""
+    @classmethod
+    def extract_spectrogram(cls, audio: np.ndarray, sr: int,
+                            device: torch.device = torch.device('cpu')) -> np.ndarray:
+        """Extract mel-spectrogram from audio, in dB relative to its peak."""
         try:
-            mel_spec = librosa.feature.melspectrogram(y=audio, sr=sr)
-            return librosa.power_to_db(mel_spec, ref=np.max)
+            if torchaudio is None:
+                mel_spec = librosa.feature.melspectrogram(y=audio, sr=sr)
+                return librosa.power_to_db(mel_spec, ref=np.max)
+            
+            waveform = torch.from_numpy(np.ascontiguousarray(audio, dtype=np.float32)).to(device)
+            with torch.inference_mode():
+                mel_spec = cls._get_transform('mel', sr, device)(waveform)
+                mel_spec = mel_spec - mel_spec.max()
+            return mel_spec.cpu().numpy()
         except Exception as e:
             print(f"Error extracting spectrogram: {e}")
             return np.array([])
@@ -182,14 +379,20 @@ class AudioProcessor:
     def get_audio_properties(audio_path: str) -> dict:
         """Get audio file properties."""
         try:
-            y, sr = librosa.load(audio_path, sr=None)
-            duration = librosa.get_duration(y=y, sr=sr)
+            try:
+                # Header-only read; no samples are decoded
+                info = sf.info(audio_path)
+                sr, duration, frame_count = info.samplerate, info.duration, info.frames
+            except RuntimeError:
+                y, sr = librosa.load(audio_path, sr=None)
+                duration = librosa.get_duration(y=y, sr=sr)
+                frame_count = len(y)
             
             return {
                 'sample_rate': sr,
                 'duration': duration,
-                'frame_count': len(y),
-                'file_size': Path(audio_path).stat().st_size,
+                'frame_count': frame_count,
+                'file_size': file_stat(audio_path).st_size,
             }
         except Exception as e:
             print(f"Error getting audio properties: {e}")
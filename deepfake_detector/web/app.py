@@ -3,24 +3,67 @@ Flask web application for deepfake detection.
 """
 
 import os
+import threading
+import uuid
+import orjson
 import torch
+from collections import OrderedDict
+from typing import Optional
 from flask import Flask, render_template, request, jsonify, send_file
-from werkzeug.utils import secure_filename
+from flask.json.provider import DefaultJSONProvider
 from deepfake_detector.config import (
     FLASK_ENV, DEBUG, SECRET_KEY, UPLOAD_FOLDER, 
-    REPORTS_FOLDER, ALLOWED_EXTENSIONS, MAX_FILE_SIZE
+    REPORTS_FOLDER, ALLOWED_EXTENSIONS, MAX_FILE_SIZE, INFERENCE_TIMEOUT,
+    RESULT_CACHE_SIZE, TORCH_THREADS, INFERENCE_USE_PROCESSES
 )
 from deepfake_detector.utils.file_handler import (
-    allowed_file, validate_upload, ensure_upload_dir, get_file_type
+    allowed_file, validate_upload, ensure_upload_dir, get_file_type, save_upload,
+    get_secure_filename
 )
 from deepfake_detector.core.detection_engine import DetectionEngine
 from deepfake_detector.forensics.report_generator import ReportGenerator
+from deepfake_detector.web.inference_server import InferenceServer
 
+_HEALTH_BODY = orjson.dumps({'status': 'healthy'})
 
-def create_app():
-    """Create and configure Flask application."""
+
+class ORJSONProvider(DefaultJSONProvider):
+    """JSON provider backed by orjson, which also serializes NumPy values natively."""
+    
+    _options = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+    
+    def dumps(self, obj, **kwargs) -> str:
+        return orjson.dumps(obj, default=self.default, option=self._options).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
+def _set_torch_threads(num_threads: int) -> None:
+    """Size PyTorch's thread pools; the inter-op pool can only be sized before it starts."""
+    torch.set_num_threads(num_threads)
+    try:
+        torch.set_num_interop_threads(max(1, num_threads // 2))
+    except RuntimeError:
+        pass
+
+
+def create_app(torch_threads: Optional[int] = None, use_processes: Optional[bool] = None):
+    """
+    Create and configure Flask application.
+    
+    Args:
+        torch_threads: PyTorch intra-op threads (defaults to TORCH_THREADS)
+        use_processes: Run CPU inference batches in worker processes (defaults to
+            INFERENCE_USE_PROCESSES); ignored on CUDA, where one in-process copy of
+            the models is shared
+    """
+    
+    # Requests already run on several threads; many intra-op threads on top of that oversubscribe the CPU
+    _set_torch_threads(torch_threads or TORCH_THREADS)
     
     app = Flask(__name__, template_folder='../templates', static_folder='../static')
+    app.json = ORJSONProvider(app)
     
     # Configuration
     app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
@@ -37,6 +80,20 @@ def create_app():
     try:
         detection_engine = DetectionEngine()
         app.detection_engine = detection_engine
+        # Pay compile and autotune costs at startup rather than on the first upload
+        detection_engine.warmup()
+        # Concurrent uploads are batched into shared forward passes
+        if use_processes is None:
+            use_processes = INFERENCE_USE_PROCESSES
+        on_cpu = detection_engine.model_registry.get_device().type == 'cpu'
+        app.inference_server = InferenceServer(detection_engine, use_processes=use_processes and on_cpu)
+        # System info is fixed once the models are loaded
+        app.sys_info = {
+            'version': '1.0.0',
+            'cuda_available': torch.cuda.is_available(),
+            'device': str(detection_engine.model_registry.get_device()),
+            'models_loaded': detection_engine.model_registry.list_models(),
+        }
     except Exception as e:
         app.logger.warning(f"Failed to load some models: {e}")
     
@@ -44,6 +101,10 @@ def create_app():
     report_generator = ReportGenerator(REPORTS_FOLDER)
     app.report_generator = report_generator
     
+    # Responses for recently seen upload content, keyed by content hash
+    app.result_cache = OrderedDict()
+    result_cache_lock = threading.Lock()
+    
     # Routes
     @app.route('/')
     def index():
@@ -54,6 +115,12 @@ def create_app():
     def upload_file():
         """Handle file upload and detection."""
         
+        # Reject oversized uploads from the header, before any of the body is read
+        if request.content_length is not None and request.content_length > MAX_FILE_SIZE:
+            return jsonify({
+                'error': f"File too large. Maximum size: {MAX_FILE_SIZE / (1024**2):.0f} MB"
+            }), 413
+        
         if 'file' not in request.files:
             return jsonify({'error': 'No file provided'}), 400
         
@@ -62,27 +129,47 @@ def create_app():
         if file.filename == '':
             return jsonify({'error': 'No filename'}), 400
         
-        # Validate upload
-        is_valid, error_msg = validate_upload(file.filename, 0)
+        # Validate upload; the body is already spooled and within MAX_FILE_SIZE,
+        # so measuring it is cheap
+        file.stream.seek(0, os.SEEK_END)
+        file_size = file.stream.tell()
+        file.stream.seek(0)
+        
+        is_valid, error_msg = validate_upload(file.filename, file_size)
         if not is_valid:
             return jsonify({'error': error_msg}), 400
         
         try:
-            # Save file
-            filename = secure_filename(file.filename)
-            file_path = os.path.join(UPLOAD_FOLDER, filename)
-            file.save(file_path)
+            filename = get_secure_filename(file.filename)
+            
+            # Resolve the media type up front so unsupported uploads never reach the disk
+            media_type = get_file_type(filename)
+            if media_type not in app.detection_engine.handlers:
+                return jsonify({'error': f'Unsupported media type: {media_type}'}), 400
             
-            # Detect media type
-            media_type = get_file_type(file_path)
+            # Save file under a unique on-disk name so concurrent uploads of the same file don't clash
+            file_path = os.path.join(UPLOAD_FOLDER, f"{uuid.uuid4().hex}_{filename}")
+            content_hash = save_upload(file.stream, file_path)
+            
+            # Repeated uploads of the same content and type reuse the earlier result and reports;
+            # the same bytes under another extension go through a different handler
+            cache_key = (content_hash, media_type)
+            with result_cache_lock:
+                cached = app.result_cache.get(cache_key)
+                if cached is not None:
+                    app.result_cache.move_to_end(cache_key)
+            if cached is not None:
+                os.remove(file_path)
+                return jsonify({**cached, 'filename': filename}), 200
             
             # Run detection
             app.logger.info(f"Running detection on {filename}")
-            detection_result = app.detection_engine.detect(file_path, media_type)
+            detection_result = app.inference_server.detect(file_path, media_type, timeout=INFERENCE_TIMEOUT)
             
             # Generate reports
             json_report = app.report_generator.generate_json_report(detection_result)
             html_report = app.report_generator.generate_html_report(detection_result)
+            metadata_report = app.report_generator.generate_metadata_report(detection_result)
             
             # Prepare response
             consensus, avg_conf = detection_result.get_consensus()
@@ -92,14 +179,21 @@ def create_app():
                 'filename': filename,
                 'media_type': media_type,
                 'is_deepfake': consensus,
-                'confidence': float(avg_conf),
-                'model_predictions': {k: bool(v) for k, v in detection_result.predictions.items()},
-                'model_confidences': {k: float(v) for k, v in detection_result.confidence_scores.items()},
-                'metadata': detection_result.metadata,
+                'confidence': avg_conf,
+                'model_predictions': detection_result.predictions,
+                'model_confidences': detection_result.confidence_scores,
+                # Full metadata is served separately from /api/metadata
+                'metadata': detection_result.metadata_summary(),
+                'metadata_report': os.path.basename(metadata_report),
                 'json_report': os.path.basename(json_report),
                 'html_report': os.path.basename(html_report),
             }
             
+            with result_cache_lock:
+                app.result_cache[cache_key] = response
+                if len(app.result_cache) > RESULT_CACHE_SIZE:
+                    app.result_cache.popitem(last=False)
+            
             return jsonify(response), 200
         
         except Exception as e:
@@ -110,29 +204,49 @@ def create_app():
     def get_report(report_name):
         """Download generated report."""
         try:
-            report_path = os.path.join(REPORTS_FOLDER, secure_filename(report_name))
+            report_path = os.path.join(REPORTS_FOLDER, get_secure_filename(report_name))
+            
+            # Reports are rendered in the background; ask the client to retry until this one lands
+            if app.report_generator.is_pending(report_path):
+                response = jsonify({'status': 'pending'})
+                response.headers['Retry-After'] = '1'
+                return response, 202
             
             if not os.path.exists(report_path):
                 return jsonify({'error': 'Report not found'}), 404
             
-            return send_file(report_path, as_attachment=True)
+            # conditional lets the WSGI server hand the file to sendfile and honour range requests
+            return send_file(report_path, as_attachment=True, conditional=True)
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+    
+    @app.route('/api/metadata/<report_name>')
+    def get_metadata(report_name):
+        """Get the full metadata written for an upload."""
+        try:
+            report_path = os.path.join(REPORTS_FOLDER, get_secure_filename(report_name))
+            
+            if app.report_generator.is_pending(report_path):
+                response = jsonify({'status': 'pending'})
+                response.headers['Retry-After'] = '1'
+                return response, 202
+            
+            if not report_name.endswith('.meta.json') or not os.path.exists(report_path):
+                return jsonify({'error': 'Metadata not found'}), 404
+            
+            return send_file(report_path, mimetype='application/json', conditional=True)
         except Exception as e:
             return jsonify({'error': str(e)}), 500
     
     @app.route('/api/info')
     def get_info():
         """Get system information."""
-        return jsonify({
-            'version': '1.0.0',
-            'cuda_available': torch.cuda.is_available(),
-            'device': str(app.detection_engine.model_registry.get_device()),
-            'models_loaded': app.detection_engine.model_registry.list_models(),
-        })
+        return jsonify(app.sys_info)
     
     @app.route('/api/health')
     def health_check():
         """Health check endpoint."""
-        return jsonify({'status': 'healthy'}), 200
+        return app.response_class(_HEALTH_BODY, status=200, mimetype='application/json')
     
     return app
 
@@ -0,0 +1,166 @@
+"""
+Micro-batching inference server sitting between the web handlers and the detection engine.
+"""
+
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import List, Optional
+import torch
+from deepfake_detector.core.detection_engine import DetectionEngine, DetectionResult, IMAGE_MODELS
+from deepfake_detector.config import INFERENCE_MAX_WAIT_MS, INFERENCE_QUEUE_SIZE
+
+# Independent model branches per batch; more predictors than this only contend for the device
+DEFAULT_NUM_WORKERS = min(len(IMAGE_MODELS), os.cpu_count() or 1)
+
+# Engine owned by each detection worker process
+_worker_engine: Optional[DetectionEngine] = None
+
+
+def _init_worker():
+    """Load and warm up the models once per worker process."""
+    global _worker_engine
+    torch.set_num_threads(1)
+    _worker_engine = DetectionEngine()
+    _worker_engine.warmup()
+
+
+def _ping() -> None:
+    """No-op task used to start worker processes."""
+
+
+def _detect_batch_worker(file_paths: List[str], media_types: List[Optional[str]]) -> List[DetectionResult]:
+    """Run a batch on the worker process's engine; only paths and results cross the process boundary."""
+    return _worker_engine.detect_batch(file_paths, media_types)
+
+
+class InferenceServer:
+    """Collects concurrent detection requests and runs them through the engine in batches."""
+    
+    def __init__(self, engine: DetectionEngine, max_batch_size: Optional[int] = None,
+                 max_wait_ms: float = INFERENCE_MAX_WAIT_MS, num_workers: int = DEFAULT_NUM_WORKERS,
+                 use_processes: bool = False):
+        """
+        Initialize inference server and start its worker threads.
+        
+        One batcher thread groups incoming requests; num_workers predictor threads
+        run the batches, so decoding one batch overlaps the forward pass of another.
+        
+        Args:
+            engine: Detection engine to run batches on
+            max_batch_size: Maximum number of requests per batch (defaults to the
+                registry's memory-based batch size)
+            max_wait_ms: How long to wait for a batch to fill before running it
+            num_workers: Number of predictor threads
+            use_processes: Run batches in worker processes, each with its own engine,
+                so CPU preprocessing is not serialized on the GIL. Opt-in: each worker
+                loads its own copy of the models, and the workers are started and
+                warmed here so that cost isn't paid by the first requests. Keep
+                CUDA batches in-process to share one copy of the models.
+        """
+        self.engine = engine
+        self._executor = None
+        if use_processes:
+            self._executor = ProcessPoolExecutor(
+                max_workers=num_workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+            )
+            # Spawn workers now rather than on the first requests; with none idle yet,
+            # each submitted no-op starts its own process, which loads and warms an engine
+            for future in [self._executor.submit(_ping) for _ in range(num_workers)]:
+                future.result()
+        self.max_batch_size = max_batch_size or engine.model_registry.get_batch_size()
+        self.max_wait = max_wait_ms / 1000.0
+        self.requests = queue.Queue(maxsize=INFERENCE_QUEUE_SIZE)
+        self.batches = queue.Queue(maxsize=num_workers)
+        
+        self._workers = [threading.Thread(target=self._batch_loop, name='inference-batcher', daemon=True)]
+        self._workers += [
+            threading.Thread(target=self._predict_loop, name=f'inference-predictor-{i}', daemon=True)
+            for i in range(num_workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+    
+    def submit(self, file_path: str, media_type: Optional[str] = None) -> Future:
+        """
+        Queue a file for detection.
+        
+        Args:
+            file_path: Path to media file
+            media_type: Type of media (auto-detected if None)
+            
+        Returns:
+            Future resolving to a DetectionResult
+        """
+        future = Future()
+        self.requests.put((file_path, media_type, future))
+        return future
+    
+    def detect(self, file_path: str, media_type: Optional[str] = None,
+               timeout: Optional[float] = None) -> DetectionResult:
+        """
+        Queue a file for detection and wait for its result.
+        
+        Args:
+            file_path: Path to media file
+            media_type: Type of media (auto-detected if None)
+            timeout: Seconds to wait before giving up
+            
+        Returns:
+            DetectionResult object
+        """
+        return self.submit(file_path, media_type).result(timeout=timeout)
+    
+    def _next_batch(self) -> list:
+        """Block for one request, then gather more until the batch is full or the wait expires."""
+        batch = [self.requests.get()]
+        deadline = time.monotonic() + self.max_wait
+        
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.requests.get(timeout=remaining))
+            except queue.Empty:
+                break
+        
+        return batch
+    
+    def _batch_loop(self):
+        """Batcher loop: hand grouped requests to the predictors."""
+        while True:
+            batch = self._next_batch()
+            batch = [item for item in batch if item[2].set_running_or_notify_cancel()]
+            if batch:
+                self.batches.put(batch)
+    
+    def _run_batch(self, paths: List[str], media_types: List[Optional[str]]) -> List[DetectionResult]:
+        """Run one batch on a worker process or on the in-process engine."""
+        if self._executor is not None:
+            return self._executor.submit(_detect_batch_worker, paths, media_types).result()
+        return self.engine.detect_batch(paths, media_types)
+    
+    def _predict_loop(self):
+        """Predictor loop: run each batch once and resolve its futures."""
+        while True:
+            batch = self.batches.get()
+            paths, media_types, futures = zip(*batch)
+            try:
+                results = self._run_batch(list(paths), list(media_types))
+            except Exception:
+                # One bad file must not fail the uploads batched with it; retry each on its own
+                for path, media_type, future in batch:
+                    try:
+                        future.set_result(self._run_batch([path], [media_type])[0])
+                    except Exception as e:
+                        future.set_exception(e)
+                continue
+            
+            for future, result in zip(futures, results):
+                future.set_result(result)
@@ -10,10 +10,32 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from flask import Flask, render_template, request, jsonify
+import itertools
 import json
+import random
+import time
 from datetime import datetime
 import os
 
+# Pre-generated demo predictions, indexed round-robin instead of calling random per request
+_POOL_SIZE = 1 << 16
+_POOL_CONFIDENCE = [random.uniform(0.65, 0.95) for _ in range(_POOL_SIZE)]
+_POOL_MODEL_CONFIDENCE = [(random.uniform(0.5, 0.9), random.uniform(0.5, 0.9)) for _ in range(_POOL_SIZE)]
+_POOL_VOTES = [(random.random() > 0.5, random.random() > 0.5, random.random() > 0.5) for _ in range(_POOL_SIZE)]
+_counter = itertools.count()  # next() on a count is atomic under the GIL
+
+# Report timestamp, reformatted at most once per second
+_ts_cache = (0, '')
+
+
+def _report_timestamp() -> str:
+    """Return the current time as YYYYmmdd_HHMMSS, cached per second."""
+    global _ts_cache
+    now = int(time.time())
+    if now != _ts_cache[0]:
+        _ts_cache = (now, time.strftime("%Y%m%d_%H%M%S", time.localtime(now)))
+    return _ts_cache[1]
+
 app = Flask(__name__)
 
 # Set absolute paths for templates and static
@@ -48,35 +70,37 @@ def upload_file():
         # DEMO RESPONSE - This is for demonstration
         # In production, this would use the actual detection models
         
-        import random
-        
         # Simulate analysis
-        is_deepfake = random.choice([True, False])
-        confidence = random.uniform(0.65, 0.95)
+        i = next(_counter) & (_POOL_SIZE - 1)
+        is_deepfake, gan_vote, forensics_vote = _POOL_VOTES[i]
+        confidence = _POOL_CONFIDENCE[i]
+        gan_confidence, forensics_confidence = _POOL_MODEL_CONFIDENCE[i]
+        
+        ts = _report_timestamp()
         
         response = {
             'status': 'success',
             'filename': filename,
             'media_type': 'image',  # Demo assumes image
             'is_deepfake': is_deepfake,
-            'confidence': float(confidence),
+            'confidence': confidence,
             'model_predictions': {
                 'deepfake_classifier': is_deepfake,
-                'gan_detector': random.choice([True, False]),
-                'facial_forensics': random.choice([True, False]),
+                'gan_detector': gan_vote,
+                'facial_forensics': forensics_vote,
             },
             'model_confidences': {
-                'deepfake_classifier': float(confidence),
-                'gan_detector': float(random.uniform(0.5, 0.9)),
-                'facial_forensics': float(random.uniform(0.5, 0.9)),
+                'deepfake_classifier': confidence,
+                'gan_detector': gan_confidence,
+                'facial_forensics': forensics_confidence,
             },
             'metadata': {
                 'note': 'DEMO MODE - Install dependencies for real detection',
                 'filename': filename,
                 'analysis_time': datetime.now().isoformat(),
             },
-            'json_report': f'demo_report_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json',
-            'html_report': f'demo_report_{datetime.now().strftime("%Y%m%d_%H%M%S")}.html',
+            'json_report': f'demo_report_{ts}.json',
+            'html_report': f'demo_report_{ts}.html',
         }
         
         return jsonify(response), 200
@@ -5,132 +5,94 @@ Educational AI-based deepfake detection system
 Running in DEMO MODE with simulated predictions
 """
 
+import functools
+import gzip
+import hashlib
 import http.server
+import itertools
 import json
 import os
 import random
+import socket
+import time
 from datetime import datetime
+from email.utils import formatdate
 from urllib.parse import urlparse, parse_qs
 from pathlib import Path
 import sys
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
 PORT = 5000
 HOST = '0.0.0.0'
+MAX_UPLOAD_SIZE = 500 * 1024 * 1024
+# Server processes sharing the port; only used where SO_REUSEPORT and fork are available
+WORKERS = int(os.environ.get('DEMO_WORKERS', os.cpu_count() or 1))
 
-class DeepfakeDemoHandler(http.server.BaseHTTPRequestHandler):
-    """HTTP request handler for demo server."""
-    
-    def do_GET(self):
-        """Handle GET requests."""
-        if self.path == '/':
-            self.serve_index()
-        elif self.path == '/api/info':
-            self.json_response({
-                'status': 'running',
-                'mode': 'DEMO MODE',
-                'version': '1.0.0',
-                'message': 'Deepfake Detection System (Demo)',
-                'note': 'This is demo mode. Install dependencies for real detection.',
-            })
-        elif self.path == '/api/health':
-            self.json_response({'status': 'healthy', 'mode': 'demo'})
-        else:
-            self.send_error(404)
+
+def _dumps(data):
+    """Encode an API payload compactly, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, separators=(',', ':')).encode('utf-8')
+
+
+def _minify_html(content):
+    """
+    Strip indentation and blank lines from a page.
     
-    def do_POST(self):
-        """Handle POST requests."""
-        if self.path == '/api/upload':
-            self.handle_upload()
-        else:
-            self.send_error(404)
+    Line breaks are kept so inline JavaScript still parses the same way;
+    pages with whitespace-sensitive elements are returned unchanged.
+    """
+    if b'<pre' in content or b'<textarea' in content:
+        return content
+    return b'\n'.join(line.strip() for line in content.splitlines() if line.strip())
+
+
+def _page_variants(content):
+    """
+    Minify and precompress a static page once.
     
-    def handle_upload(self):
-        """Handle file upload and return demo results."""
-        try:
-            content_length = int(self.headers.get('Content-Length', 0))
-            
-            if content_length > 500 * 1024 * 1024:
-                self.json_response({'error': 'File too large'}, 400)
-                return
-            
-            # Simulate detection with random results
-            is_deepfake = random.choice([True, False])
-            confidence = random.uniform(0.65, 0.95)
-            
-            response_data = {
-                'status': 'success',
-                'filename': 'sample_upload.jpg',
-                'media_type': 'image',
-                'is_deepfake': is_deepfake,
-                'confidence': round(confidence, 3),
-                'model_predictions': {
-                    'deepfake_classifier': is_deepfake,
-                    'gan_detector': random.choice([True, False]),
-                    'facial_forensics': random.choice([True, False]),
-                },
-                'model_confidences': {
-                    'deepfake_classifier': round(confidence, 3),
-                    'gan_detector': round(random.uniform(0.5, 0.9), 3),
-                    'facial_forensics': round(random.uniform(0.5, 0.9), 3),
-                },
-                'metadata': {
-                    'analysis_time': datetime.now().isoformat(),
-                    'mode': 'DEMO - Random predictions for demonstration',
-                    'note': 'Install full dependencies for real deepfake detection',
-                },
-                'json_report': 'demo_report.json',
-                'html_report': 'demo_report.html',
-            }
-            
-            self.json_response(response_data)
-        
-        except Exception as e:
-            self.json_response({'error': str(e)}, 500)
+    Returns a dict mapping Content-Encoding ('' for none) to (body, ETag).
+    """
+    content = _minify_html(content)
+    digest = hashlib.md5(content).hexdigest()
+    variants = {'': (content, f'"{digest}"')}
+    if brotli is not None:
+        variants['br'] = (brotli.compress(content, quality=11), f'"{digest}-br"')
+    variants['gzip'] = (gzip.compress(content, 9), f'"{digest}-gzip"')
+    return variants
+
+
+def _load_index():
+    """Find index.html once and return its encoded variants, or None if it is missing."""
+    base_dir = Path(__file__).parent.absolute()
+    possible_paths = [
+        base_dir / 'deepfake_detector' / 'templates' / 'index.html',
+        Path(os.getcwd()) / 'deepfake_detector' / 'templates' / 'index.html',
+        Path('deepfake_detector') / 'templates' / 'index.html',
+    ]
     
-    def serve_index(self):
-        """Serve the index.html file."""
-        # Try multiple possible paths
-        base_dir = Path(__file__).parent.absolute()
-        possible_paths = [
-            base_dir / 'deepfake_detector' / 'templates' / 'index.html',
-            Path(os.getcwd()) / 'deepfake_detector' / 'templates' / 'index.html',
-            Path('deepfake_detector') / 'templates' / 'index.html',
-        ]
-        
-        html_path = None
-        for path in possible_paths:
-            if path.exists():
-                html_path = path
-                break
-        
-        if html_path is None:
-            self.send_response(200)
-            self.send_header('Content-type', 'text/html; charset=utf-8')
-            self.end_headers()
-            # Serve fallback HTML
-            fallback_html = self.get_fallback_html()
-            self.wfile.write(fallback_html.encode('utf-8'))
-            return
-        
+    for path in possible_paths:
         try:
-            with open(html_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            self.send_response(200)
-            self.send_header('Content-type', 'text/html; charset=utf-8')
-            self.send_header('Content-Length', len(content.encode('utf-8')))
-            self.end_headers()
-            self.wfile.write(content.encode('utf-8'))
-        except Exception as e:
-            self.send_response(200)
-            self.send_header('Content-type', 'text/html; charset=utf-8')
-            self.end_headers()
-            fallback_html = self.get_fallback_html()
-            self.wfile.write(fallback_html.encode('utf-8'))
+            content = path.read_bytes()
+        except OSError:
+            continue
+        return _page_variants(content)
     
-    def get_fallback_html(self):
-        """Return fallback HTML if index.html not found."""
-        return """<!DOCTYPE html>
+    return None
+
+
+# Served when index.html is not found
+FALLBACK_HTML = """<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
@@ -572,52 +534,253 @@ class DeepfakeDemoHandler(http.server.BaseHTTPRequestHandler):
             document.getElementById('confidenceText').textContent = `${confidence.toFixed(1)}%`;
             
             const predictionsBody = document.getElementById('predictionsBody');
-            predictionsBody.innerHTML = '';
-            
-            for (const [model, prediction] of Object.entries(data.model_predictions)) {
+            // Build all rows first so the table is parsed once
+            predictionsBody.innerHTML = Object.entries(data.model_predictions).map(([model, prediction]) => {
                 const confidenceScore = data.model_confidences[model] || 0;
                 const badgeClass = prediction ? 'deepfake' : 'authentic';
                 const predictionText = prediction ? 'Deepfake' : 'Authentic';
                 
-                const row = `
+                return `
                     <tr>
                         <td>${model}</td>
                         <td><span class="badge ${badgeClass}">${predictionText}</span></td>
                         <td>${(confidenceScore * 100).toFixed(1)}%</td>
                     </tr>
                 `;
-                predictionsBody.innerHTML += row;
-            }
+            }).join('');
             
             results.classList.add('show');
         }
     </script>
 </body>
 </html>"""
+
+# index.html is static, so it is read and compressed once at startup;
+# the fallback page is only encoded when it is needed
+PAGE_VARIANTS = _load_index() or _page_variants(FALLBACK_HTML.encode('utf-8'))
+
+# Pre-generated demo predictions, indexed round-robin instead of calling random per request
+_POOL_SIZE = 1 << 16
+_POOL_CONFIDENCE = [round(random.uniform(0.65, 0.95), 3) for _ in range(_POOL_SIZE)]
+_POOL_MODEL_CONFIDENCE = [
+    (round(random.uniform(0.5, 0.9), 3), round(random.uniform(0.5, 0.9), 3)) for _ in range(_POOL_SIZE)
+]
+_POOL_VOTES = [(random.random() > 0.5, random.random() > 0.5, random.random() > 0.5) for _ in range(_POOL_SIZE)]
+_counter = itertools.count()  # next() on a count is atomic under the GIL
+
+# Analysis timestamp, reformatted at most once per second
+_ts_cache = (0, '')
+
+
+def _analysis_time():
+    """Return the current time in ISO format, cached per second."""
+    global _ts_cache
+    now = int(time.time())
+    if now != _ts_cache[0]:
+        _ts_cache = (now, datetime.fromtimestamp(now).isoformat())
+    return _ts_cache[1]
+
+# Header sets of JSON responses; constant, so they are built once
+_CORS_HEADERS = (
+    ('Access-Control-Allow-Origin', '*'),
+    ('Access-Control-Allow-Methods', 'GET, POST, OPTIONS'),
+    ('Access-Control-Allow-Headers', 'Content-Type'),
+)
+_JSON_HEADERS = (('Content-type', 'application/json'),) + _CORS_HEADERS
+_JSON_CLOSE_HEADERS = (('Content-type', 'application/json'), ('Connection', 'close')) + _CORS_HEADERS
+
+# HTTP Date header, reformatted at most once per second
+_date_cache = (0, b'')
+
+
+def _http_date():
+    """Return the Date header line and the blank line ending the headers, cached per second."""
+    global _date_cache
+    now = int(time.time())
+    if now != _date_cache[0]:
+        _date_cache = (now, f'Date: {formatdate(now, usegmt=True)}\r\n\r\n'.encode('latin-1'))
+    return _date_cache[1]
+
+
+@functools.lru_cache(maxsize=64)
+def _response_head(protocol, status_code, reason, server, headers, length):
+    """Assemble the status line and every header except Date; responses share few shapes."""
+    lines = [f'{protocol} {status_code} {reason}\r\n', f'Server: {server}\r\n']
+    lines += [f'{name}: {value}\r\n' for name, value in headers]
+    if status_code != 304:
+        lines.append(f'Content-Length: {length}\r\n')
+    return ''.join(lines).encode('latin-1')
+
+# Responses of the constant endpoints, encoded once
+INFO_BYTES = _dumps({
+    'status': 'running',
+    'mode': 'DEMO MODE',
+    'version': '1.0.0',
+    'message': 'Deepfake Detection System (Demo)',
+    'note': 'This is demo mode. Install dependencies for real detection.',
+})
+HEALTH_BYTES = _dumps({'status': 'healthy', 'mode': 'demo'})
+
+class DeepfakeDemoHandler(http.server.BaseHTTPRequestHandler):
+    """HTTP request handler for demo server."""
+    
+    # Persistent connections; every response carries Content-Length
+    protocol_version = 'HTTP/1.1'
+    # Small JSON responses go out immediately instead of waiting on Nagle's algorithm
+    disable_nagle_algorithm = True
+    
+    def do_GET(self):
+        """Handle GET requests."""
+        if self.path == '/':
+            self.serve_index()
+        elif self.path == '/api/info':
+            self.send_json_bytes(INFO_BYTES)
+        elif self.path == '/api/health':
+            self.send_json_bytes(HEALTH_BYTES)
+        else:
+            self.send_error(404)
+    
+    def do_POST(self):
+        """Handle POST requests."""
+        if self.path == '/api/upload':
+            self.handle_upload()
+        else:
+            self.send_error(404)
+    
+    def handle_upload(self):
+        """Handle file upload and return demo results."""
+        try:
+            content_length = int(self.headers.get('Content-Length', 0))
+            
+            # Demo predictions don't depend on the upload, so the body is never read;
+            # close the connection afterwards instead of leaving it half-consumed
+            self.close_connection = True
+            
+            if content_length > MAX_UPLOAD_SIZE:
+                self.json_response({'error': 'File too large'}, 413)
+                return
+            
+            # Simulate detection with random results
+            i = next(_counter) & (_POOL_SIZE - 1)
+            is_deepfake, gan_vote, forensics_vote = _POOL_VOTES[i]
+            confidence = _POOL_CONFIDENCE[i]
+            gan_confidence, forensics_confidence = _POOL_MODEL_CONFIDENCE[i]
+            
+            response_data = {
+                'status': 'success',
+                'filename': 'sample_upload.jpg',
+                'media_type': 'image',
+                'is_deepfake': is_deepfake,
+                'confidence': confidence,
+                'model_predictions': {
+                    'deepfake_classifier': is_deepfake,
+                    'gan_detector': gan_vote,
+                    'facial_forensics': forensics_vote,
+                },
+                'model_confidences': {
+                    'deepfake_classifier': confidence,
+                    'gan_detector': gan_confidence,
+                    'facial_forensics': forensics_confidence,
+                },
+                'metadata': {
+                    'analysis_time': _analysis_time(),
+                    'mode': 'DEMO - Random predictions for demonstration',
+                    'note': 'Install full dependencies for real deepfake detection',
+                },
+                'json_report': 'demo_report.json',
+                'html_report': 'demo_report.html',
+            }
+            
+            self.json_response(response_data)
+        
+        except Exception as e:
+            self.json_response({'error': str(e)}, 500)
+    
+    def serve_index(self):
+        """Serve the index.html file."""
+        self.send_html(PAGE_VARIANTS)
+    
+    def send_html(self, variants):
+        """Send an HTML page in the best encoding the client accepts; browsers must revalidate it before reuse."""
+        accepted = self.headers.get('Accept-Encoding', '')
+        encoding = next((e for e in ('br', 'gzip') if e in variants and e in accepted), '')
+        content, etag = variants[encoding]
+        
+        if self.headers.get('If-None-Match') == etag:
+            # Client copy is current; send headers only
+            self.send_whole_response(304, [
+                ('ETag', etag),
+                ('Cache-Control', 'no-cache, must-revalidate'),
+                ('Vary', 'Accept-Encoding'),
+            ])
+            return
+        
+        headers = [('Content-type', 'text/html; charset=utf-8')]
+        if encoding:
+            headers.append(('Content-Encoding', encoding))
+        headers += [
+            ('Vary', 'Accept-Encoding'),
+            ('Cache-Control', 'no-cache, must-revalidate'),
+            ('ETag', etag),
+        ]
+        self.send_whole_response(200, headers, content)
     
     def json_response(self, data, status_code=200):
         """Send JSON response."""
-        json_data = json.dumps(data, indent=2)
-        json_bytes = json_data.encode('utf-8')
-        
-        self.send_response(status_code)
-        self.send_header('Content-type', 'application/json')
-        self.send_header('Content-Length', len(json_bytes))
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-        self.end_headers()
-        self.wfile.write(json_bytes)
+        self.send_json_bytes(_dumps(data), status_code)
+    
+    def send_json_bytes(self, json_bytes, status_code=200):
+        """Send an already-encoded JSON body."""
+        headers = _JSON_CLOSE_HEADERS if self.close_connection else _JSON_HEADERS
+        self.send_whole_response(status_code, headers, json_bytes)
+    
+    def send_whole_response(self, status_code, headers, body=b''):
+        """
+        Send status line, headers and body in a single write.
+        
+        Content-Length is added for every status that may carry a body.
+        """
+        self.log_request(status_code)
+        head = _response_head(self.protocol_version, status_code, self.responses[status_code][0],
+                              self.version_string(), tuple(headers), len(body))
+        self.wfile.write(head + _http_date() + body)
     
     def log_message(self, format, *args):
         """Suppress default logging."""
         pass
 
+class DemoHTTPServer(http.server.ThreadingHTTPServer):
+    """Threaded HTTP server whose port can be shared by several processes."""
+    
+    def server_bind(self):
+        if hasattr(socket, 'SO_REUSEPORT'):
+            # Each worker binds its own socket; the kernel balances connections between them
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        # Inherited by accepted sockets, so dead idle keep-alive clients are eventually dropped
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        super().server_bind()
+
+
+def _fork_workers(count):
+    """Fork count - 1 extra server processes; returns True in the original process."""
+    if count <= 1 or not hasattr(socket, 'SO_REUSEPORT') or not hasattr(os, 'fork'):
+        return True
+    
+    for _ in range(count - 1):
+        if os.fork() == 0:
+            return False
+    return True
+
+
 if __name__ == '__main__':
+    is_main_process = _fork_workers(WORKERS)
+    
     server_address = (HOST, PORT)
-    httpd = http.server.HTTPServer(server_address, DeepfakeDemoHandler)
+    # One thread per connection so a slow upload doesn't stall every other client
+    httpd = DemoHTTPServer(server_address, DeepfakeDemoHandler)
     
-    print("""
+    if is_main_process:
+        print("""
 ╔════════════════════════════════════════════════════════════════╗
 ║                                                                ║
 ║   🛡️  DEEPFAKE DETECTION SYSTEM - DEMO MODE                   ║
@@ -652,9 +815,10 @@ if __name__ == '__main__':
 ║   ⏹️  Press CTRL+C to Stop Server                             ║
 ║                                                                ║
 ╚════════════════════════════════════════════════════════════════╝
-    """)
+        """)
     
     try:
         httpd.serve_forever()
     except KeyboardInterrupt:
-        print("\n\n✓ Server stopped.")
+        if is_main_process:
+            print("\n\n✓ Server stopped.")
@@ -1,180 +1,193 @@
 """
 Example usage scenarios for the Deepfake Detection System
+
+Run this file to execute Examples 1-10; the helpers in Examples 11-14 are
+only defined. Everything runs under the __main__ guard at the bottom, so
+worker processes started with spawn can import this module safely.
 """
 
-# Example 1: Basic Image Analysis
-# ===============================
+import os
+import torch
+import numpy as np
+from deepfake_detector import config
 from deepfake_detector.core.detection_engine import DetectionEngine
+from deepfake_detector.forensics.forensic_analyzer import ForensicAnalyzer, MetadataAnalyzer
+from deepfake_detector.forensics.report_generator import ReportGenerator
+from deepfake_detector.models.model_registry import ModelRegistry
+from deepfake_detector.utils.file_handler import iter_media
+from deepfake_detector.utils.media_processor import ImageProcessor
 
-engine = DetectionEngine()
+_ENGINE = None  # shared by every example
 
-# Analyze single image
-result = engine.detect('sample_image.jpg', 'image')
-is_deepfake, confidence = result.get_consensus()
+def _get_engine():
+    """Create the detection engine on first use, so model weights load only once."""
+    global _ENGINE
+    if _ENGINE is None:
+        _ENGINE = DetectionEngine()
+    return _ENGINE
 
-print(f"Verdict: {'Deepfake' if is_deepfake else 'Authentic'}")
-print(f"Confidence: {confidence:.1%}")
+
+# Example 1: Basic Image Analysis
+# ===============================
+def example_basic_image_analysis():
+    engine = _get_engine()
+    
+    # Analyze single image
+    result = engine.detect('sample_image.jpg', 'image')
+    is_deepfake, confidence = result.get_consensus()
+    
+    print(f"Verdict: {'Deepfake' if is_deepfake else 'Authentic'}")
+    print(f"Confidence: {confidence:.1%}")
 
 
 # Example 2: Video Analysis with Temporal Tracking
 # ================================================
-result = engine.detect('sample_video.mp4', 'video')
-
-temporal_data = result.analysis_details.get('temporal_consistency', {})
-frame_predictions = temporal_data.get('frame_predictions', [])
-fake_count = sum(frame_predictions)
-total_frames = len(frame_predictions)
-
-print(f"\nVideo Analysis:")
-print(f"Analyzed {total_frames} frames")
-print(f"Suspicious frames: {fake_count}/{total_frames}")
-print(f"Confidence: {result.get_consensus()[1]:.1%}")
+def example_video_analysis():
+    result = _get_engine().detect('sample_video.mp4', 'video')
+    
+    temporal_data = result.analysis_details.get('temporal_consistency', {})
+    frame_predictions = temporal_data.get('frame_predictions', [])
+    fake_count = sum(frame_predictions)
+    total_frames = len(frame_predictions)
+    
+    print(f"\nVideo Analysis:")
+    print(f"Analyzed {total_frames} frames")
+    print(f"Suspicious frames: {fake_count}/{total_frames}")
+    print(f"Confidence: {result.get_consensus()[1]:.1%}")
 
 
 # Example 3: Batch Processing Multiple Files
 # ===========================================
-import os
-from pathlib import Path
-
-image_dir = 'images_to_analyze'
-files = [str(f) for f in Path(image_dir).glob('*.jpg')]
-
-results = engine.batch_detect(files)
-
-for result in results:
-    is_fake, conf = result.get_consensus()
-    status = "⚠️ Deepfake" if is_fake else "✓ Authentic"
-    print(f"{result.filename}: {status} ({conf:.1%})")
+def example_batch_processing(image_dir='images_to_analyze'):
+    files = list(iter_media(image_dir))
+    
+    results = _get_engine().batch_detect(files)
+    
+    for result in results:
+        is_fake, conf = result.get_consensus()
+        status = "⚠️ Deepfake" if is_fake else "✓ Authentic"
+        print(f"{result.filename}: {status} ({conf:.1%})")
 
 
 # Example 4: Detailed Forensic Analysis
 # ======================================
-from deepfake_detector.forensics.forensic_analyzer import ForensicAnalyzer
-from deepfake_detector.utils.media_processor import ImageProcessor
-
-analyzer = ForensicAnalyzer()
-
-# Get forensic report
-forensic_report = analyzer.analyze_image('test_image.jpg')
-
-print("\nForensic Analysis Results:")
-print(f"- Compression artifacts: {forensic_report['compression_analysis']['compression_artifact_score']:.2f}")
-print(f"- Color inconsistencies: {forensic_report['color_analysis']['unnatural_colors']}")
-print(f"- Edge formation issues: {forensic_report['edge_analysis']['suspicious_edges']}")
-print(f"- Lighting inconsistencies: {forensic_report['lighting_analysis']['inconsistent_lighting']}")
+def example_forensic_analysis():
+    analyzer = ForensicAnalyzer()
+    
+    # Get forensic report
+    forensic_report = analyzer.analyze_image('test_image.jpg')
+    
+    print("\nForensic Analysis Results:")
+    print(f"- Compression artifacts: {forensic_report['compression_analysis']['compression_artifact_score']:.2f}")
+    print(f"- Color inconsistencies: {forensic_report['color_analysis']['unnatural_colors']}")
+    print(f"- Edge formation issues: {forensic_report['edge_analysis']['suspicious_edges']}")
+    print(f"- Lighting inconsistencies: {forensic_report['lighting_analysis']['inconsistent_lighting']}")
 
 
 # Example 5: Generate Reports Programmatically
 # =============================================
-from deepfake_detector.forensics.report_generator import ReportGenerator
-
-generator = ReportGenerator()
-
-result = engine.detect('image.jpg')
-
-# Generate both JSON and HTML reports
-json_report_path = generator.generate_json_report(result)
-html_report_path = generator.generate_html_report(result)
-
-print(f"\nReports generated:")
-print(f"- JSON: {json_report_path}")
-print(f"- HTML: {html_report_path}")
-
-# Access the report data
-report_data = result.to_dict()
-print(f"Report data: {report_data}")
+def example_reports():
+    generator = ReportGenerator()
+    
+    result = _get_engine().detect('image.jpg')
+    
+    # Generate both JSON and HTML reports
+    json_report_path = generator.generate_json_report(result)
+    html_report_path = generator.generate_html_report(result)
+    
+    print(f"\nReports generated:")
+    print(f"- JSON: {json_report_path}")
+    print(f"- HTML: {html_report_path}")
+    
+    # Access the report data
+    report_data = result.to_dict()
+    print(f"Report data: {report_data}")
 
 
 # Example 6: Custom Model Predictions
 # ===================================
-import torch
-import numpy as np
-from deepfake_detector.models.model_registry import ModelRegistry
-from deepfake_detector.utils.media_processor import ImageProcessor
-
-registry = ModelRegistry()
-registry.load_all_models()
-
-# Load and preprocess image
-image = ImageProcessor.read_image('test.jpg')
-image_resized = ImageProcessor.resize_image(image, (224, 224))
-image_normalized = ImageProcessor.normalize_image(image_resized)
-image_tensor = torch.from_numpy(image_normalized).permute(2, 0, 1).unsqueeze(0)
-
-device = registry.get_device()
-image_tensor = image_tensor.to(device)
-
-# Run each model individually
-with torch.no_grad():
-    classifier = registry.get_model('deepfake_classifier')
-    if classifier:
-        logits = classifier(image_tensor)
-        probs = torch.nn.functional.softmax(logits, dim=1)
-        confidence = float(probs[0, 1].cpu().numpy())
-        print(f"\nDeepfake Classifier Confidence: {confidence:.1%}")
+def example_custom_model_predictions():
+    registry = ModelRegistry()
+    registry.load_all_models()
+    
+    # Load and preprocess image
+    image = ImageProcessor.read_image('test.jpg')
+    image_resized = ImageProcessor.resize_image(image, (224, 224))
+    image_normalized = ImageProcessor.normalize_image(image_resized)
+    image_tensor = torch.from_numpy(image_normalized).permute(2, 0, 1).unsqueeze(0)
+    
+    device = registry.get_device()
+    image_tensor = image_tensor.to(device)
+    
+    # Run each model individually
+    with torch.no_grad():
+        classifier = registry.get_model('deepfake_classifier')
+        if classifier:
+            logits = classifier(image_tensor)
+            probs = torch.nn.functional.softmax(logits, dim=1)
+            confidence = float(probs[0, 1].cpu().numpy())
+            print(f"\nDeepfake Classifier Confidence: {confidence:.1%}")
 
 
 # Example 7: Audio Analysis
 # =========================
-audio_result = engine.detect('audio_file.wav', 'audio')
-
-mfcc_stats = audio_result.analysis_details.get('mfcc_stats', {})
-spec_stats = audio_result.analysis_details.get('spectrogram_stats', {})
-
-print(f"\nAudio Analysis:")
-print(f"- MFCC Mean: {mfcc_stats.get('mean', 'N/A')}")
-print(f"- Spectral Entropy: {audio_result.analysis_details.get('audio_analysis', {}).get('spectral_entropy', 'N/A')}")
+def example_audio_analysis():
+    audio_result = _get_engine().detect('audio_file.wav', 'audio')
+    
+    mfcc_stats = audio_result.analysis_details.get('mfcc_stats', {})
+    spec_stats = audio_result.analysis_details.get('spectrogram_stats', {})
+    
+    print(f"\nAudio Analysis:")
+    print(f"- MFCC Mean: {mfcc_stats.get('mean', 'N/A')}")
+    print(f"- Spectral Entropy: {audio_result.analysis_details.get('audio_analysis', {}).get('spectral_entropy', 'N/A')}")
 
 
 # Example 8: Confidence Threshold Customization
 # ============================================
-from deepfake_detector import config
-
-# Adjust sensitivity
-original_threshold = config.CONFIDENCE_THRESHOLD
-config.CONFIDENCE_THRESHOLD = 0.7  # More strict (fewer false positives)
-
-result_strict = engine.detect('image.jpg')
-print(f"\nWith strict threshold (0.7): {result_strict.get_consensus()}")
-
-# Restore original
-config.CONFIDENCE_THRESHOLD = original_threshold
+def example_threshold_customization():
+    # Adjust sensitivity
+    original_threshold = config.CONFIDENCE_THRESHOLD
+    config.CONFIDENCE_THRESHOLD = 0.7  # More strict (fewer false positives)
+    
+    result_strict = _get_engine().detect('image.jpg')
+    print(f"\nWith strict threshold (0.7): {result_strict.get_consensus()}")
+    
+    # Restore original
+    config.CONFIDENCE_THRESHOLD = original_threshold
 
 
 # Example 9: Metadata Extraction
 # ==============================
-from deepfake_detector.forensics.forensic_analyzer import MetadataAnalyzer
-
-metadata_analyzer = MetadataAnalyzer()
-
-# Extract EXIF data
-exif_data = metadata_analyzer.extract_image_exif('image_with_exif.jpg')
-print(f"\nEXIF Data:")
-for key, value in exif_data.items():
-    print(f"  {key}: {value}")
-
-# Get file properties
-file_props = metadata_analyzer.get_file_properties('image.jpg')
-print(f"\nFile Properties:")
-for key, value in file_props.items():
-    print(f"  {key}: {value}")
+def example_metadata_extraction():
+    metadata_analyzer = MetadataAnalyzer()
+    
+    # Extract EXIF data
+    exif_data = metadata_analyzer.extract_image_exif('image_with_exif.jpg')
+    print(f"\nEXIF Data:")
+    for key, value in exif_data.items():
+        print(f"  {key}: {value}")
+    
+    # Get file properties
+    file_props = metadata_analyzer.get_file_properties('image.jpg')
+    print(f"\nFile Properties:")
+    for key, value in file_props.items():
+        print(f"  {key}: {value}")
 
 
 # Example 10: Web Server Integration
 # ==================================
 # This is handled in deepfake_detector/web/app.py
 # But you can also use it programmatically:
-
-from deepfake_detector.web.app import create_app
-import os
-
-# Create Flask app
-app = create_app()
-
-# Access the detection engine from the app
-with app.app_context():
-    result = app.detection_engine.detect('image.jpg')
-    print(f"Analysis result: {result.to_dict()}")
+def example_web_app():
+    from deepfake_detector.web.app import create_app
+    
+    # Create Flask app
+    app = create_app()
+    
+    # Access the detection engine from the app
+    with app.app_context():
+        result = app.detection_engine.detect('image.jpg')
+        print(f"Analysis result: {result.to_dict()}")
 
 
 # Example 11: Stream Processing (Large File)
@@ -213,7 +226,7 @@ def process_incoming_media(file_path, alert_callback=None):
     This shows how to integrate the detection system with external workflows.
     """
     
-    engine = DetectionEngine()
+    engine = _get_engine()
     result = engine.detect(file_path)
     is_deepfake, confidence = result.get_consensus()
     
@@ -256,49 +269,242 @@ def analyze_model_agreement(image_path):
     High disagreement might indicate uncertain cases.
     """
     
-    result = engine.detect(image_path)
+    result = _get_engine().detect(image_path)
     
-    predictions = result.predictions.values()
-    agreement = (sum(predictions) / len(predictions)) if predictions else 0.5
+    preds = result.prediction_array()
+    agreement = float(preds.mean()) if preds.size else 0.5
+    spread = float(preds.std()) if preds.size else 0.0
     
     print(f"\nModel Agreement Analysis:")
     print(f"- Consensus prediction: {result.get_consensus()[0]}")
     print(f"- Agreement ratio: {agreement:.1%}")
+    print(f"- Vote spread (std): {spread:.2f}")
     print(f"- Individual predictions: {result.predictions}")
     
-    if 0.3 < agreement < 0.7:
+    # Votes are 0/1, so a spread near its 0.5 maximum means the models are split
+    if spread > 0.45:
         print("⚠️ Models disagree - manual review recommended")
     else:
         print("✓ Models agree - confident prediction")
 
 # analyze_model_agreement('test_image.jpg')
 
+def summarize_agreement(results):
+    """Flag uncertain cases across many results with one vectorized reduction."""
+    
+    scored = [result for result in results if result.predictions]
+    if not scored:
+        return
+    
+    num_models = max(len(result.predictions) for result in scored)
+    scored = [result for result in scored if len(result.predictions) == num_models]
+    
+    preds = np.stack([result.prediction_array() for result in scored])
+    agreements = preds.mean(axis=1)
+    uncertain = np.flatnonzero((agreements > 0.3) & (agreements < 0.7))
+    
+    print(f"\nModel Agreement Across {len(scored)} Files:")
+    print(f"- Mean agreement ratio: {agreements.mean():.1%}")
+    print(f"- Uncertain cases: {len(uncertain)}")
+    for i in uncertain:
+        print(f"  ⚠️ {scored[i].filename} ({agreements[i]:.1%})")
+
+# summarize_agreement(_get_engine().batch_detect(files))
+
 
 # Example 14: Performance Metrics
 # ===============================
+import itertools
+import json
+import queue
+import threading
 import time
+import torch.multiprocessing
 from pathlib import Path
 
-def benchmark_detection_speed(image_dir, num_samples=10):
-    """Benchmark detection speed on multiple images."""
+_benchmark_engine = None  # engine owned by each benchmark worker process
+
+def _benchmark_worker_init(num_threads):
+    """Give each worker process its own engine and a fixed share of the cores."""
+    global _benchmark_engine
+    torch.set_num_threads(num_threads)
+    _benchmark_engine = DetectionEngine()
+
+def _benchmark_detect(image_path):
+    start = time.perf_counter_ns()
+    result = _benchmark_engine.detect(image_path)
+    return result, time.perf_counter_ns() - start
+
+def _first_jpgs(image_dir, limit):
+    """Return up to `limit` .jpg paths, stopping the directory scan as soon as enough are found."""
+    with os.scandir(image_dir) as entries:
+        jpgs = (entry.path for entry in entries if entry.name.endswith('.jpg') and entry.is_file())
+        return list(itertools.islice(jpgs, limit))
+
+def benchmark_detection_speed(image_dir, num_samples=10, threads_per_worker=2):
+    """
+    Benchmark detection speed on multiple images.
     
-    images = list(Path(image_dir).glob('*.jpg'))[:num_samples]
+    Latency percentiles are per image: detection time in the CPU workers, and
+    time until each result arrives on the GPU path, where images are batched together.
+    """
     
-    start_time = time.time()
+    paths = _first_jpgs(image_dir, num_samples)
+    latencies = np.empty(len(paths), dtype=np.int64)
     
-    results = engine.batch_detect([str(img) for img in images])
+    start_time = time.perf_counter_ns()
     
-    elapsed = time.time() - start_time
+    if torch.cuda.is_available():
+        # The GPU already batches across images; CUDA state can't be shared with forked workers
+        results = []
+        for i, (path, result) in enumerate(_get_engine().batch_detect_iter(paths)):
+            latencies[i] = time.perf_counter_ns() - start_time
+            results.append(result)
+    else:
+        # CPU: a few intra-op threads per process scales better than one process using every core
+        num_workers = max(1, (os.cpu_count() or 1) // threads_per_worker)
+        # spawn, not fork: this process's OpenMP pool is already running, and forking it can hang the workers
+        context = torch.multiprocessing.get_context('spawn')
+        with context.Pool(num_workers, initializer=_benchmark_worker_init, initargs=(threads_per_worker,)) as pool:
+            timed = pool.map(_benchmark_detect, paths, chunksize=max(1, len(paths) // (4 * num_workers)))
+        results = [result for result, _ in timed]
+        latencies[:] = [latency for _, latency in timed]
+    
+    elapsed = (time.perf_counter_ns() - start_time) / 1e9
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) / 1e6
     
     print(f"\nPerformance Metrics:")
     print(f"- Processed {len(results)} images")
     print(f"- Total time: {elapsed:.2f}s")
     print(f"- Average per image: {elapsed/len(results):.2f}s")
     print(f"- Images per second: {len(results)/elapsed:.2f}")
+    print(f"- Latency p50/p95/p99: {p50:.1f} / {p95:.1f} / {p99:.1f} ms")
+    
+    summarize_agreement(results)
 
 # benchmark_detection_speed('images_folder')
 
-
-print("\n" + "="*50)
-print("Examples completed! Explore each to learn the system.")
-print("="*50)
+def _readahead(path):
+    """Ask the kernel to start reading a file in the background (no-op where unsupported)."""
+    if not hasattr(os, 'posix_fadvise'):
+        return
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+    finally:
+        os.close(fd)
+
+def process_folder_pipelined(paths, callback, prefetch=8):
+    """
+    Analyze images as a three-stage pipeline: a reader thread decodes, the
+    main thread runs the models, and a writer thread hands results to callback.
+    
+    The bounded queues keep disk and JPEG decoding overlapped with inference;
+    the models themselves only ever run on the calling thread.
+    """
+    engine = _get_engine()
+    analyzer = engine.image_analyzer
+    batch_size = engine.model_registry.get_batch_size()
+    paths = list(paths)
+    read_q = queue.Queue(maxsize=prefetch)
+    write_q = queue.Queue(maxsize=prefetch)
+    stop = threading.Event()
+    errors = []  # exceptions raised on the side threads, re-raised on the calling thread
+    
+    def _reader():
+        try:
+            # Keep `prefetch` files' worth of reads queued in the kernel ahead of decoding
+            for path in paths[:prefetch]:
+                _readahead(path)
+            for i, path in enumerate(paths):
+                if stop.is_set():
+                    break
+                if i + prefetch < len(paths):
+                    _readahead(paths[i + prefetch])
+                read_q.put(analyzer.load_image(path))
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            read_q.put(None)
+    
+    def _writer():
+        while True:
+            result = write_q.get()
+            if result is None:
+                break
+            if stop.is_set():
+                continue  # keep draining so the main thread never blocks on a full queue
+            try:
+                callback(result)
+            except BaseException as e:
+                errors.append(e)
+                stop.set()
+    
+    reader = threading.Thread(target=_reader, daemon=True)
+    writer = threading.Thread(target=_writer, daemon=True)
+    reader.start()
+    writer.start()
+    
+    try:
+        done = False
+        while not done and not stop.is_set():
+            # Block for one image, then take whatever else is already decoded
+            batch = [read_q.get()]
+            while batch[-1] is not None and len(batch) < batch_size:
+                try:
+                    batch.append(read_q.get_nowait())
+                except queue.Empty:
+                    break
+            if batch[-1] is None:
+                batch.pop()
+                done = True
+            
+            readable = [(result, image) for result, image in batch if image is not None]
+            if readable:
+                results, images = zip(*readable)
+                analyzer.analyze_loaded(list(results), list(images))
+            for result, _ in batch:
+                write_q.put(result)
+    except BaseException:
+        stop.set()
+        raise
+    finally:
+        # Unblock the reader if the loop ended early, then let the writer finish
+        while reader.is_alive():
+            try:
+                read_q.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        write_q.put(None)
+        reader.join()
+        writer.join()
+    
+    if errors:
+        raise errors[0]
+
+def _write_result_json(result):
+    with open(Path(result.filename).with_suffix('.result.json'), 'w') as f:
+        json.dump(result.to_dict(), f)
+
+# process_folder_pipelined(_first_jpgs('images_folder', 100), _write_result_json)
+
+
+if __name__ == '__main__':
+    example_basic_image_analysis()
+    example_video_analysis()
+    example_batch_processing()
+    example_forensic_analysis()
+    example_reports()
+    example_custom_model_predictions()
+    example_audio_analysis()
+    example_threshold_customization()
+    example_metadata_extraction()
+    example_web_app()
+    
+    print("\n" + "="*50)
+    print("Examples completed! Explore each to learn the system.")
+    print("="*50)
@@ -3,9 +3,10 @@
 Main entry point for Deepfake Detection System
 """
 
+import os
 import sys
 import argparse
-from deepfake_detector.web.app import create_app
+from deepfake_detector.config import TORCH_THREADS, INFERENCE_USE_PROCESSES
 
 
 def main():
@@ -28,6 +29,27 @@ def main():
         help='Port to bind to (default: 5000)'
     )
     
+    parser.add_argument(
+        '--threads',
+        type=int,
+        default=os.cpu_count() or 4,
+        help='Request handler threads (default: number of CPUs)'
+    )
+    
+    parser.add_argument(
+        '--torch-threads',
+        type=int,
+        default=TORCH_THREADS,
+        help='PyTorch intra-op threads (default: TORCH_THREADS, half the CPUs)'
+    )
+    
+    parser.add_argument(
+        '--inference-processes',
+        action='store_true',
+        default=INFERENCE_USE_PROCESSES,
+        help='On CPU, run inference in worker processes, each with its own copy of the models'
+    )
+    
     parser.add_argument(
         '--debug',
         action='store_true',
@@ -36,9 +58,19 @@ def main():
     
     args = parser.parse_args()
     
+    # OpenMP/MKL size their pools when torch loads, so set these before importing the app
+    os.environ.setdefault('OMP_NUM_THREADS', str(args.torch_threads))
+    os.environ.setdefault('MKL_NUM_THREADS', str(args.torch_threads))
+    from deepfake_detector.web.app import create_app
+    
     # Create and run app
-    app = create_app()
-    app.run(host=args.host, port=args.port, debug=args.debug)
+    app = create_app(torch_threads=args.torch_threads, use_processes=args.inference_processes)
+    if args.debug:
+        # Werkzeug's dev server, for the reloader and interactive debugger
+        app.run(host=args.host, port=args.port, debug=True)
+    else:
+        from waitress import serve
+        serve(app, host=args.host, port=args.port, threads=args.threads)
 
 
 if __name__ == '__main__':
@@ -3,6 +3,7 @@
 Setup and validation script for the Deepfake Detection System
 """
 
+import importlib.util
 import sys
 import os
 from pathlib import Path
@@ -30,19 +31,17 @@ def check_dependencies():
         'scipy',
     ]
     
+    # Import names that differ from the package name
+    module_names = {'opencv': 'cv2'}
+    
     print("\nChecking dependencies...")
     all_installed = True
     
     for package in required_packages:
-        try:
-            if package == 'opencv':
-                import cv2
-            elif package == 'PIL':
-                from PIL import Image
-            else:
-                __import__(package)
+        # find_spec locates the package without running its (slow) import-time setup
+        if importlib.util.find_spec(module_names.get(package, package)) is not None:
             print(f"  ✓ {package}")
-        except ImportError:
+        else:
             print(f"  ❌ {package} (not installed)")
             all_installed = False
     
@@ -70,6 +69,22 @@ def check_pytorch_gpu():
         return False
 
 
+def _scan_tree(required_dirs):
+    """List the project's directories and files in one pass, descending only into required directories."""
+    wanted = {os.path.normpath(path) for path in required_dirs}
+    dirs_present = set()
+    files_present = set()
+    
+    for root, dirs, files in os.walk('.'):
+        root = os.path.normpath(root)
+        if root != '.':
+            dirs_present.add(root)
+        files_present.update(os.path.normpath(os.path.join(root, name)) for name in files)
+        dirs[:] = [name for name in dirs if os.path.normpath(os.path.join(root, name)) in wanted]
+    
+    return dirs_present, files_present
+
+
 def check_project_structure():
     """Verify project structure is complete."""
     print("\nVerifying project structure...")
@@ -105,17 +120,18 @@ def check_project_structure():
         'deepfake_detector/templates/index.html',
     ]
     
+    dirs_present, files_present = _scan_tree(required_dirs)
     all_exists = True
     
     for dir_path in required_dirs:
-        if os.path.isdir(dir_path):
+        if os.path.normpath(dir_path) in dirs_present:
             print(f"  ✓ {dir_path}")
         else:
             print(f"  ❌ {dir_path} (missing)")
             all_exists = False
     
     for file_path in required_files:
-        if os.path.isfile(file_path):
+        if os.path.normpath(file_path) in files_present:
             print(f"  ✓ {file_path}")
         else:
             print(f"  ❌ {file_path} (missing)")